@@ -0,0 +1,95 @@
+"""Batch engine speed and equivalence with the scalar engine.
+
+First replays random inputs through src.engine and src.batch_engine side by
+side (scalar food copied from the batch, since the two draw food from
+different generators) and checks every game ends up in the same state.
+Then times game ticks per second for both, the scalar side being the loop
+Game.update runs (engine.step on the drawable Snake and Food), and checks
+the batch against a target speed-up. Exits with status 1 if no batch size
+reaches it.
+
+    python benchmarks/bench_batch.py --games 1000 4000 20000 --steps 500
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+from src.constants import GRID_WIDTH, GRID_HEIGHT
+from src.engine import new_game, step
+from src.snake import Snake
+from src.food import Food
+from src.batch_engine import BatchGames, DIRECTIONS, NO_ACTION, check_against_engine
+
+
+def random_actions(rng, n, turn_rate=0.3):
+    actions = rng.integers(0, 4, size=n).astype(np.int8)
+    actions[rng.random(n) >= turn_rate] = NO_ACTION
+    return actions
+
+
+def check_equivalence(games, steps, seed, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    over, won = check_against_engine(games, steps, seed, grid_width, grid_height)
+    print(f"Equivalence on {grid_width}x{grid_height}: {games} games x {steps} steps match ({over} over, {won} won)")
+
+
+def scalar_rate(steps, seed):
+    rng = np.random.default_rng(seed)
+    actions = random_actions(rng, steps)
+    moves = [DIRECTIONS[a] if a != NO_ACTION else None for a in actions]
+    ticks = 0
+    started = time.perf_counter()
+    state = new_game(seed, Snake, Food)
+    for action in moves:
+        if state.game_over:
+            state = new_game(seed + ticks, Snake, Food)
+        step(state, action)
+        ticks += 1
+    return ticks / (time.perf_counter() - started)
+
+
+def batch_rate(games, steps, seed):
+    rng = np.random.default_rng(seed)
+    actions = [random_actions(rng, games) for _ in range(16)]
+    batch = BatchGames(games, seed=seed)
+    started = time.perf_counter()
+    for t in range(steps):
+        batch.step(actions[t % len(actions)])
+    elapsed = time.perf_counter() - started
+    return int(batch.tick.sum()) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 4000, 20000])
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--check-games", type=int, default=200)
+    parser.add_argument("--check-steps", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--target", type=float, default=100.0, help="speed-up over the scalar loop to reach")
+    args = parser.parse_args()
+
+    check_equivalence(args.check_games, args.check_steps, args.seed)
+    # A small board, where snakes crash, run out of lives and sometimes fill it
+    check_equivalence(args.check_games, args.check_steps, args.seed, 5, 4)
+
+    scalar = scalar_rate(200000, args.seed)
+    print(f"Scalar loop:   {scalar:14,.0f} game ticks/s")
+    best = 0.0
+    for games in args.games:
+        batch = batch_rate(games, args.steps, args.seed)
+        best = max(best, batch / scalar)
+        print(f"Batch engine:  {batch:14,.0f} game ticks/s ({games} games, {batch / scalar:.1f}x)")
+    passed = best >= args.target
+    print(f"Target {args.target:.0f}x: {'PASS' if passed else 'FAIL'} (best {best:.1f}x)")
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
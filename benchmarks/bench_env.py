@@ -0,0 +1,62 @@
+"""Environment throughput: env steps per second against worker count.
+
+Times one SnakeEnv in this process, then a VectorEnv of --envs games with
+each worker count, all taking random actions.
+
+    python benchmarks/bench_env.py --envs 64 --workers 1 2 4 8
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from src.env import SnakeEnv, VectorEnv, ACTIONS
+
+
+def single_rate(steps, seed):
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, len(ACTIONS), size=steps).tolist()
+    env = SnakeEnv(seed=seed, max_idle_ticks=1000)
+    env.reset()
+    started = time.perf_counter()
+    for action in actions:
+        _, _, terminated, truncated, _ = env.step(action)
+        if terminated or truncated:
+            env.reset()
+    return steps / (time.perf_counter() - started)
+
+
+def vector_rate(num_envs, workers, steps, seed):
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(0, len(ACTIONS), size=(16, num_envs), dtype=np.int8)
+    with VectorEnv(num_envs, num_workers=workers, seed=seed, max_idle_ticks=1000) as env:
+        env.reset()
+        env.step(actions[0]) # Workers are up before timing
+        started = time.perf_counter()
+        for i in range(steps):
+            env.step(actions[i % len(actions)])
+        elapsed = time.perf_counter() - started
+    return steps * num_envs / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--steps", type=int, default=500, help="vector steps per run")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count()}))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores")
+    single = single_rate(args.steps * 20, args.seed)
+    print(f"{'single env':>12}: {single:12,.0f} steps/s")
+    for workers in args.workers:
+        rate = vector_rate(args.envs, workers, args.steps, args.seed)
+        print(f"{workers:>4} workers: {rate:12,.0f} steps/s ({rate / single:.1f}x, {args.envs} envs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""Benchmark suite for gameplay, rendering and leaderboard I/O.
+
+Times Snake.move and Food.randomize_position as the snake fills the board,
+Game.draw and the MainMenu screens under SDL's dummy video driver, and
+Database.add_score/get_top_scores when BENCH_DSN names a scratch Postgres
+database (e.g. "host=localhost dbname=bench user=postgres"). The database
+benchmarks write rows named bench_* and delete them afterwards; they are
+skipped when BENCH_DSN is unset or the server can't be reached.
+
+Results are saved as JSON with machine metadata. --compare checks them
+against a saved baseline and exits with status 1 if anything got slower
+by more than --threshold.
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --compare baseline.json
+    python benchmarks/bench_suite.py --only 'snake.*' 'food.*'
+    python benchmarks/bench_suite.py --results new.json --compare baseline.json   # no run
+"""
+import os
+import sys
+import json
+import time
+import fnmatch
+import platform
+import argparse
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from src.constants import GRID_WIDTH, GRID_HEIGHT, SCREEN_WIDTH, SCREEN_HEIGHT, DIFFICULTY, RENDER_FPS
+from src.engine import UP, DOWN, LEFT, RIGHT
+
+# Snake lengths, as a share of the 40x30 board
+FILLS = (0.0025, 0.1, 0.5, 0.9, 0.99)
+
+DB_ROWS = 1000 # bench_* players in the table while the database is timed
+
+
+def hamiltonian_cycle(width, height):
+    """Cells of a closed tour visiting every cell once, without wrapping.
+
+    Along the top row, back and forth through columns 1.. of the other
+    rows, then up column 0. height must be even.
+    """
+    cells = [x for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        cells.extend(y * width + x for x in xs)
+    cells.extend(y * width for y in range(height - 1, 0, -1))
+    return cells
+
+
+class CycleDriver:
+    """Steers a snake round the Hamiltonian cycle, so it can be any length and never dies."""
+
+    def __init__(self, snake):
+        width, height = snake.grid_width, snake.grid_height
+        cycle = hamiltonian_cycle(width, height)
+        self.snake = snake
+        self.turn_at = {}
+        for cell, next_cell in zip(cycle, cycle[1:] + cycle[:1]):
+            (y, x), (ny, nx) = divmod(cell, width), divmod(next_cell, width)
+            self.turn_at[cell] = {(1, 0): RIGHT, (-1, 0): LEFT, (0, 1): DOWN, (0, -1): UP}[(nx - x, ny - y)]
+
+    def grow_to(self, length):
+        """Reset the snake and run it round the cycle until it is length long."""
+        snake = self.snake
+        snake.reset_position()
+        snake.length = length
+        while snake.size < length:
+            self.advance()
+
+    def advance(self):
+        snake = self.snake
+        snake.turn(self.turn_at[snake.head_cell])
+        snake.move()
+
+
+class FixedLeaderboard:
+    """Leaderboard stand-in with a full page of rows, so menu screens draw without a database."""
+
+    is_loading = False
+    in_flight = ()
+
+    def __init__(self):
+        self.rows = [(i + 1, f"player{i}", 1000 - i * 10, "Medium") for i in range(10)]
+
+    def is_online(self):
+        return True
+
+    def can_play(self):
+        return True
+
+    def get_page(self, difficulty, page):
+        return self.rows, True
+
+    def get_rank(self, username, difficulty):
+        return (500, 42, 1000)
+
+
+def autorange(run, min_time):
+    """Ops per repeat so that one repeat takes at least min_time seconds."""
+    n = 1
+    while True:
+        started = time.perf_counter()
+        run(n)
+        if time.perf_counter() - started >= min_time or n >= 1 << 24:
+            return n
+        n *= 2
+
+
+def measure(run, repeat, min_time):
+    """Per-op times in microseconds, one per repeat."""
+    n = autorange(run, min_time)
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(n)
+        times.append((time.perf_counter() - started) / n * 1e6)
+    return n, times
+
+
+def gameplay_benchmarks():
+    from src.snake import Snake
+    from src.food import Food
+    import random
+
+    capacity = GRID_WIDTH * GRID_HEIGHT
+    for fill in FILLS:
+        length = max(3, round(capacity * fill))
+        snake = Snake()
+        driver = CycleDriver(snake)
+        driver.grow_to(length)
+
+        def move(n, advance=driver.advance):
+            for _ in range(n):
+                advance()
+        yield f"snake.move[len={length}]", {"length": length, "fill": fill}, move
+
+        food = Food(random.Random(1))
+        positions = snake.positions
+
+        def randomize(n, randomize_position=food.randomize_position):
+            for _ in range(n):
+                randomize_position(positions)
+        yield f"food.randomize_position[len={length}]", {"length": length, "fill": fill}, randomize
+
+
+def rendering_benchmarks(screen):
+    from src.game import Game
+    from src.menu import MainMenu
+    from src.scheduler import FrameScheduler
+
+    capacity = GRID_WIDTH * GRID_HEIGHT
+    frames_per_step = max(1, RENDER_FPS // DIFFICULTY["Medium"])
+    for fill in (0.0025, 0.5, 0.9):
+        length = max(3, round(capacity * fill))
+        game = Game(screen, DIFFICULTY["Medium"], "Medium", FrameScheduler(), seed=1, record=False)
+        driver = CycleDriver(game.snake)
+        driver.grow_to(length)
+
+        def full(n, game=game):
+            for _ in range(n):
+                game.renderer.invalidate()
+                game.draw(0.5)
+        yield f"game.draw[full,len={length}]", {"length": length}, full
+
+        def frames(n, game=game, driver=driver):
+            # Like Game.loop at Medium: a step every few frames, sliding in between
+            renderer = game.renderer
+            for i in range(n):
+                frame = i % frames_per_step
+                if not frame:
+                    driver.advance()
+                    renderer.note_step(game.snake, [])
+                game.draw(frame / frames_per_step)
+        yield f"game.draw[frame,len={length}]", {"length": length, "frames_per_step": frames_per_step}, frames
+
+    # Each screen redrawn from scratch (static layers cached, as after the
+    # first frame); handle_game runs a whole game and is covered by Game.draw
+    scheduler = FrameScheduler()
+    menu = MainMenu(screen, scheduler)
+    menu.leaderboard = FixedLeaderboard()
+    menu.splash_shown = True
+    menu.username = "benchmark"
+    for state, handler in (("connecting", menu.handle_connecting),
+                           ("connection_error", menu.handle_connection_error),
+                           ("login", menu.handle_login),
+                           ("menu", menu.handle_menu),
+                           ("leaderboard", menu.handle_leaderboard),
+                           ("help", menu.handle_help)):
+        def redraw(n, state=state, handler=handler):
+            for _ in range(n):
+                menu.state = state
+                scheduler.invalidate()
+                handler()
+                scheduler.present()
+        yield f"menu.handle_{state}", {}, redraw
+
+
+def database_benchmarks(skipped):
+    dsn = os.environ.get("BENCH_DSN")
+    if not dsn:
+        skipped["database"] = "BENCH_DSN not set"
+        return
+    try:
+        from psycopg2.extensions import parse_dsn
+        from src.database import Database
+    except ImportError as e:
+        skipped["database"] = f"psycopg2 not available: {e}"
+        return
+
+    db = Database()
+    db.conn_params = dict(parse_dsn(dsn))
+    probe = db.get_connection(timeout=3)
+    if probe is None:
+        skipped["database"] = "could not connect to BENCH_DSN"
+        return
+    probe.close()
+    db.connect()
+    if not db.connected:
+        skipped["database"] = "could not set up the schema"
+        return
+
+    try:
+        difficulties = list(DIFFICULTY)
+        db.add_scores([(f"bench_{i}", i, difficulties[i % 3], f"bench-key-{i}", None) for i in range(DB_ROWS)])
+        counter = [DB_ROWS]
+
+        def add_score(n):
+            for _ in range(n):
+                counter[0] += 1
+                i = counter[0]
+                db.add_score(f"bench_{i % DB_ROWS}", i, difficulties[i % 3])
+        yield "database.add_score", {"rows": DB_ROWS}, add_score
+
+        def top_scores(n):
+            for _ in range(n):
+                db.get_top_scores(10)
+        yield "database.get_top_scores", {"rows": DB_ROWS}, top_scores
+
+        def top_scores_difficulty(n):
+            for _ in range(n):
+                db.get_top_scores(10, "Medium")
+        yield "database.get_top_scores[Medium]", {"rows": DB_ROWS}, top_scores_difficulty
+    finally:
+        with db.pool.connection() as pc:
+            with pc.conn.cursor() as cur:
+                cur.execute("DELETE FROM scores WHERE username LIKE 'bench\\_%'")
+            pc.conn.commit()
+        db.close()
+
+
+def metadata():
+    info = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "pygame": pygame.version.ver,
+        "sdl": ".".join(str(v) for v in pygame.get_sdl_version()),
+        "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+    }
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                        text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        info["commit"] = None
+    return info
+
+
+def run_suite(patterns, repeat, min_time):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    results = {}
+    skipped = {}
+    groups = (gameplay_benchmarks(), rendering_benchmarks(screen), database_benchmarks(skipped))
+    for group in groups:
+        for name, params, run in group:
+            if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+                continue
+            n, times = measure(run, repeat, min_time)
+            results[name] = {"unit": "us", "ops": n, "times": [round(t, 3) for t in times],
+                             "min": round(min(times), 3), "median": round(statistics.median(times), 3),
+                             "params": params}
+            print(f"{name:<40} {results[name]['median']:>12.2f} us  (min {results[name]['min']:.2f}, {n} ops x {repeat})")
+    for name, reason in skipped.items():
+        print(f"{name:<40} skipped: {reason}")
+    pygame.quit()
+    return {"metadata": metadata(), "results": results, "skipped": skipped}
+
+
+def compare(baseline, current, threshold):
+    """Print each benchmark's change against the baseline. Returns the names that regressed."""
+    base_meta, meta = baseline.get("metadata", {}), current.get("metadata", {})
+    for key in ("machine", "processor", "cpu_count", "python", "pygame", "video_driver"):
+        if base_meta.get(key) != meta.get(key):
+            print(f"Note: {key} differs from the baseline ({base_meta.get(key)} -> {meta.get(key)})")
+
+    regressions = []
+    print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>12} {result['median']:>12.2f}      new")
+            continue
+        change = result["median"] / base["median"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "faster"
+        print(f"{name:<40} {base['median']:>12.2f} {result['median']:>12.2f} {change:>+8.1%}  {flag}")
+    for name in baseline["results"]:
+        if name not in current["results"]:
+            print(f"{name:<40} {baseline['results'][name]['median']:>12.2f} {'-':>12}      not run")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", metavar="PATTERN", help="run benchmarks matching these globs")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per repeat, at least")
+    parser.add_argument("--save", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--results", help="compare these saved results instead of running the suite")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against these results")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = run_suite(args.only, args.repeat, args.min_time)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
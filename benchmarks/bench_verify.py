@@ -0,0 +1,80 @@
+"""Replay verification throughput.
+
+Generates games of src.tournament's GreedyPolicy as replays, then times
+src.verify.check_rows on one process and on a process pool. No database
+is needed.
+
+    python benchmarks/bench_verify.py --replays 2000 --workers 1 4 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.engine import new_game, step
+from src.replay import ReplayRecorder
+from src.tournament import GreedyPolicy
+from src.verify import check_rows, VERIFIED, REJECTED
+
+
+def make_replay(seed, difficulty, max_ticks, policy):
+    """Play one bot game and return (claimed score, replay bytes)."""
+    state = new_game(seed)
+    recorder = ReplayRecorder(seed, difficulty, state.snake.grid_width, state.snake.grid_height)
+    policy.reset(seed)
+    while not state.game_over and state.tick < max_ticks:
+        action = policy.choose(state)
+        if action is not None:
+            recorder.record(state.tick, action)
+        step(state, action)
+    recorder.finish(state)
+    return state.score, bytes(recorder.data), state.tick
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replays", type=int, default=2000)
+    parser.add_argument("--max-ticks", type=int, default=3000, help="game length cap, in ticks")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    policy = GreedyPolicy()
+    print(f"Generating {args.replays} replays...")
+    rows = []
+    total_ticks = 0
+    total_bytes = 0
+    for i in range(args.replays):
+        score, data, ticks = make_replay(rng.getrandbits(64), "Medium", args.max_ticks, policy)
+        # Every tenth submission claims more than it scored
+        claimed = score + 10 if i % 10 == 9 else score
+        rows.append((i, f"key{i}", claimed, "Medium", data))
+        total_ticks += ticks
+        total_bytes += len(data)
+    print(f"  {total_ticks / args.replays:.0f} ticks and {total_bytes / args.replays:.0f} bytes per replay on average")
+
+    expected = [REJECTED if i % 10 == 9 else VERIFIED for i in range(args.replays)]
+
+    started = time.perf_counter()
+    results = check_rows(rows)
+    elapsed = time.perf_counter() - started
+    assert [r[2] for r in results] == expected, "verdicts differ from the expected ones"
+    print(f"{'in process':>12}: {elapsed:7.2f}s  {args.replays / elapsed * 60:10,.0f} replays/min")
+
+    for workers in args.workers:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            check_rows(rows[:workers], executor) # Start the workers before timing
+            started = time.perf_counter()
+            results = check_rows(rows, executor, chunksize=max(1, args.replays // (workers * 8)))
+            elapsed = time.perf_counter() - started
+        assert [r[2] for r in results] == expected, "verdicts differ from the expected ones"
+        print(f"{workers:>4} workers: {elapsed:7.2f}s  {args.replays / elapsed * 60:10,.0f} replays/min")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import sys
+import time
 import platform
 import subprocess
 import shutil
@@ -84,6 +85,52 @@ def build():
         print(f"Build failed with error: {e}")
         sys.exit(1)
 
+def executable_path():
+    """Path of the built executable inside dist/."""
+    system = platform.system()
+    if system == "Darwin":
+        return os.path.join("dist", "Maze Runner.app", "Contents", "MacOS", "Maze Runner")
+    elif system == "Windows":
+        return os.path.join("dist", "Maze Runner", "Maze Runner.exe")
+    return os.path.join("dist", "Maze Runner", "Maze Runner")
+
+def profile_startup(timeout=120):
+    """Launch the built app with --profile-startup and print its report."""
+    exe = executable_path()
+    if not os.path.exists(exe):
+        print(f"Executable not found: {exe}. Build the app first.")
+        sys.exit(1)
+
+    report = os.path.abspath(os.path.join("build", "startup-profile.txt"))
+    os.makedirs(os.path.dirname(report), exist_ok=True)
+    if os.path.exists(report):
+        os.remove(report)
+
+    env = os.environ.copy()
+    # Lets the app include bootloader and interpreter start-up in its times
+    env["MAZE_RUNNER_LAUNCH_TIME"] = repr(time.time())
+    print(f"Profiling start-up of {exe}...")
+    try:
+        subprocess.run([exe, "--profile-startup", "--profile-output", report], env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        print(f"The app did not become interactive within {timeout} seconds.")
+        sys.exit(1)
+
+    if not os.path.exists(report):
+        print("The app exited without writing a start-up profile.")
+        sys.exit(1)
+    with open(report, encoding="utf-8") as f:
+        print(f.read())
+    print(f"Report saved to {report}")
+
 if __name__ == "__main__":
-    clean_build_dirs()
-    build()
+    # --profile-startup: build, then measure the bundle's cold start
+    # --profile-only: measure the existing build without rebuilding
+    if "--profile-only" in sys.argv:
+        profile_startup()
+    else:
+        clean_build_dirs()
+        build()
+        if "--profile-startup" in sys.argv:
+            profile_startup()
@@ -1,34 +1,65 @@
 import sys
+from src import startup_profile
+
+# Must be installed before the imports below to see them
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+if PROFILE_STARTUP:
+    startup_profile.install()
+
 import pygame
 import logging
-import os
 from src.constants import SCREEN_WIDTH, SCREEN_HEIGHT, CAPTION
+from src import fonts, log
 from src.menu import MainMenu
+from src.scheduler import FrameScheduler
+from src import profiler
+from src.profiler import frame_profiler
+
+def argv_value(flag):
+    """Value given after flag on the command line, or None."""
+    if flag in sys.argv:
+        index = sys.argv.index(flag)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
 
 def setup_logging():
-    log_file = os.path.join(os.path.expanduser("~"), "maze_runner_debug.log")
-    logging.basicConfig(
-        filename=log_file,
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    logging.info("Application started")
+    # --log-level takes a level or per-logger levels, e.g. "INFO,src.sync=DEBUG"
+    json_lines = True if "--log-json" in sys.argv else None
+    log_file = log.setup_logging(argv_value("--log-level"), json_lines)
+    logging.info(f"Application started, logging to {log_file}")
+
+def profile_output_path():
+    """Value of --profile-output PATH, or None for the default location."""
+    return argv_value("--profile-output")
 
 def main():
+    startup_profile.mark("imports done")
     setup_logging()
     try:
         logging.info("Initializing Pygame")
         pygame.init()
         screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(CAPTION)
-        clock = pygame.time.Clock()
+        startup_profile.mark("window open")
+        # Resolve system fonts once instead of per screen
+        fonts.init()
+        # Presents every frame and paces the loop, for the menus and the game
+        scheduler = FrameScheduler()
+        if "--profile-frames" in sys.argv:
+            frame_profiler.enable() # Same as pressing F3
 
         logging.info("Creating MainMenu")
-        menu = MainMenu(screen)
+        menu = MainMenu(screen, scheduler)
+        startup_profile.mark("menu created")
         
         running = True
+        first_frame = True
         logging.info("Entering main loop")
         while running:
+            # The splash is up until the leaderboard has been set up
+            interactive = menu.state != "connecting"
+
             # Handle events and state transitions
             try:
                 result = menu.run()
@@ -37,15 +68,32 @@ def main():
                 running = False
                 continue
 
+            frame_profiler.mark(profiler.DRAW)
             if result == "quit":
                 logging.info("Main loop received 'quit' result")
                 running = False
-            
-            pygame.display.flip()
-            clock.tick(60)
+
+            scheduler.present()
+
+            if startup_profile.enabled():
+                if first_frame:
+                    startup_profile.mark("first frame")
+                    first_frame = False
+                elif interactive:
+                    startup_profile.mark("interactive")
+                    path = startup_profile.finish(profile_output_path())
+                    logging.info(f"Start-up profile written to {path}")
+                    running = False
+
+            scheduler.tick()
+
+        if menu.leaderboard is not None:
+            logging.info("Flushing pending scores")
+            menu.leaderboard.close()
 
         logging.info("Quitting Pygame")
         pygame.quit()
+        log.shutdown_logging()
         sys.exit()
     except Exception as e:
         logging.exception("An unhandled exception occurred:")
@@ -0,0 +1,318 @@
+import sys
+import time
+from array import array
+from src.constants import GRID_WIDTH, GRID_HEIGHT
+from src.engine import new_game, new_seed, step, START_LIVES, DIRECTIONS, neighbour_table
+
+# Default length of a headless game, in ticks
+SOAK_TICKS = 20000
+
+
+class Autopilot:
+    """Steers a snake to the food along the shortest safe path.
+
+    The board is a torus (moves wrap like SnakeModel.move), so every cell
+    has exactly four neighbours; they are worked out once per board size.
+    Searches reuse the same buffers, with a generation stamp instead of
+    clearing them, and a planned path is followed until the food moves or
+    the snake leaves it, so most ticks need no search at all.
+
+    On the way to the food a body cell blocks the head only until the tail
+    has moved off it. A path is taken only if a flood fill shows that,
+    once the snake has eaten, its head can still get behind its tail;
+    otherwise the snake chases its tail until the food is safe to reach.
+    """
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.capacity = capacity = grid_width * grid_height
+
+        # neighbours[cell * 4 + code] is the cell reached by DIRECTIONS[code]
+        self.neighbours = neighbour_table(grid_width, grid_height)
+
+        # Search buffers; a cell's entry is current only if its stamp matches
+        self.stamp = 0
+        self.seen = array('i', bytes(4 * capacity))
+        self.parent = array('i', bytes(4 * capacity))
+        self.queue = array('i', bytes(4 * capacity))
+        self.body_stamp = array('i', bytes(4 * capacity))
+        self.clear_at = array('i', bytes(4 * capacity)) # Move from which a body cell is free
+        self.body = 0 # body_stamp value of the body being searched around
+
+        self.reset()
+
+    def reset(self):
+        """Forget the planned path (new game, or a human took over)."""
+        self.path = [] # Cells still to enter, the next one last
+        self.path_food = None
+        self.path_head = None
+
+    def next_stamp(self):
+        self.stamp += 1
+        return self.stamp
+
+    def choose(self, state):
+        """Direction to steer this tick, or None to carry on as before."""
+        snake = state.snake
+        if snake.grid_width != self.grid_width or snake.grid_height != self.grid_height:
+            raise ValueError("Autopilot was built for a different board size")
+        head = snake.head_cell
+        food = state.food.cell
+
+        if not (self.path and food == self.path_food and head == self.path_head):
+            self.plan(snake, head, food)
+
+        if self.path:
+            cell = self.path.pop()
+        else:
+            cell = self.roomiest_move(snake, head, food)
+            if cell is None:
+                return None # Boxed in
+        self.path_head = cell
+
+        code = self.neighbours.index(cell, head * 4, head * 4 + 4) - head * 4
+        direction = DIRECTIONS[code]
+        return None if direction == snake.direction else direction
+
+    def plan(self, snake, head, food):
+        """Pick the path to follow until the food moves or the path runs out."""
+        self.path_food = food
+        path = self.find_path(snake, head, food) if food is not None else []
+        if path and self.reaches_tail_after(snake, path):
+            self.path = path
+            return
+        # Stall by chasing the tail through free cells, going around the
+        # food (growing on the way would close the gap), and try the food
+        # again at the end
+        self.path = []
+        if snake.size > 1:
+            self.mark_body(snake_cells(snake), snake.length, static=True)
+            chase = self.search(head, snake.tail_cell, food)
+            if chase and self.reaches_tail_after(snake, chase, eats=False):
+                self.path = chase
+
+    def mark_body(self, cells, length, static=False):
+        """Stamp body cells (head first) with the move from which each is free.
+
+        Segment k (0 = head) of a snake of this length is gone from move
+        length - k + 1 on, as long as it doesn't eat; paths end at the food,
+        so within one they never do. With static, only the tail ever frees up.
+        """
+        self.body = stamp = self.next_stamp()
+        body_stamp = self.body_stamp
+        clear_at = self.clear_at
+        blocked = self.capacity + 1 # Never free within a search
+        clear = length + 1
+        tail = None
+        for cell in cells:
+            body_stamp[cell] = stamp
+            clear_at[cell] = blocked if static else clear
+            clear -= 1
+            tail = cell
+        if static and tail is not None:
+            clear_at[tail] = clear + 1
+
+    def find_path(self, snake, head, target):
+        """Shortest path from head to target. Returns the cells, next one last."""
+        self.mark_body(snake_cells(snake), snake.length)
+        return self.search(head, target)
+
+    def search(self, start, target, avoid=None):
+        """Breadth-first search around the body from the last mark_body()."""
+        body = self.body
+        body_stamp = self.body_stamp
+        clear_at = self.clear_at
+        neighbours = self.neighbours
+        seen = self.seen
+        parent = self.parent
+        queue = self.queue
+
+        stamp = self.next_stamp()
+        seen[start] = stamp
+        if avoid is not None:
+            seen[avoid] = stamp
+        queue[0] = start
+        read, write = 0, 1
+        depth = 0
+        level_end = 1 # queue[read:level_end] are depth moves away
+        while read < write:
+            if read == level_end:
+                depth += 1
+                level_end = write
+            cell = queue[read]
+            read += 1
+            base = cell * 4
+            for next_cell in neighbours[base:base + 4]:
+                if seen[next_cell] == stamp:
+                    continue
+                if body_stamp[next_cell] == body and clear_at[next_cell] > depth + 1:
+                    continue # Still part of the body when the head gets there
+                seen[next_cell] = stamp
+                parent[next_cell] = cell
+                if next_cell == target:
+                    path = [target]
+                    while parent[path[-1]] != start:
+                        path.append(parent[path[-1]])
+                    return path
+                queue[write] = next_cell
+                write += 1
+        return []
+
+    def room(self, start, limit, depth=1):
+        """Cells the head can still reach from start (entered at move depth), up to limit.
+
+        Uses the body from the last mark_body(), freeing cells as the tail
+        would leave them.
+        """
+        body = self.body
+        body_stamp = self.body_stamp
+        clear_at = self.clear_at
+        neighbours = self.neighbours
+        seen = self.seen
+        queue = self.queue
+
+        stamp = self.next_stamp()
+        seen[start] = stamp
+        queue[0] = start
+        read, write = 0, 1
+        level_end = 1
+        while read < write:
+            if read == level_end:
+                depth += 1
+                level_end = write
+            cell = queue[read]
+            read += 1
+            base = cell * 4
+            for next_cell in neighbours[base:base + 4]:
+                if seen[next_cell] == stamp:
+                    continue
+                if body_stamp[next_cell] == body and clear_at[next_cell] > depth + 1:
+                    continue
+                seen[next_cell] = stamp
+                if write >= limit:
+                    return write
+                queue[write] = next_cell
+                write += 1
+        return write - 1
+
+    def reaches_tail_after(self, snake, path, eats=True):
+        """True if, after following path (and eating at its end), the head can reach the tail.
+
+        Only free cells count on the way: a snake that can always get behind
+        its tail can't trap itself.
+        """
+        # The body on arrival: the path (end first), then the front of the
+        # current body
+        size = min(snake.size + len(path), snake.length)
+        if size < 2:
+            return True
+        cells = path[:size] + [snake.cell_at(k) for k in range(max(size - len(path), 0))]
+        self.mark_body(cells, snake.length + 1 if eats else snake.length, static=True)
+        return bool(self.search(path[0], cells[-1]))
+
+    def legal_moves(self, snake, head):
+        """Cells the head can move to this tick without dying (or reversing)."""
+        base = head * 4
+        occupancy = snake.occupancy
+        return [cell for cell in self.neighbours[base:base + 4] if not occupancy[cell]]
+
+    def roomiest_move(self, snake, head, food):
+        """Best single move when no path is safe.
+
+        Prefers moves that keep the tail reachable, then the most room,
+        then the nearest to the food.
+        """
+        # Enough room to outlast the body counts as unlimited
+        limit = min(2 * snake.length + 2, self.capacity)
+        self.mark_body(snake_cells(snake), snake.length)
+        moves = [(self.room(cell, limit), cell) for cell in self.legal_moves(snake, head)]
+        best = None
+        best_key = None
+        for room, cell in moves:
+            key = (self.reaches_tail_after(snake, [cell], cell == food), room, -self.distance(cell, food))
+            if best_key is None or key > best_key:
+                best, best_key = cell, key
+        return best
+
+    def distance(self, a, b):
+        """Moves between two cells on the wrapping board (ignoring the body)."""
+        if b is None:
+            return 0
+        ay, ax = divmod(a, self.grid_width)
+        by, bx = divmod(b, self.grid_width)
+        dx = abs(ax - bx)
+        dy = abs(ay - by)
+        return min(dx, self.grid_width - dx) + min(dy, self.grid_height - dy)
+
+
+def snake_cells(snake):
+    """Body cells, head first, straight from the ring buffer."""
+    cells = snake.cells
+    index = snake.head_index
+    capacity = snake.capacity
+    for _ in range(snake.size):
+        yield cells[index]
+        index += 1
+        if index == capacity:
+            index = 0
+
+
+def play(seed=None, max_ticks=SOAK_TICKS, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, autopilot=None):
+    """Run one headless autopilot game.
+
+    Returns (state, seconds spent deciding, slowest single decision).
+    """
+    state = new_game(new_seed() if seed is None else seed, grid_width=grid_width, grid_height=grid_height)
+    autopilot = autopilot or Autopilot(grid_width, grid_height)
+    autopilot.reset()
+    thinking = 0.0
+    slowest = 0.0
+    while not state.game_over and state.tick < max_ticks:
+        started = time.perf_counter()
+        action = autopilot.choose(state)
+        elapsed = time.perf_counter() - started
+        thinking += elapsed
+        slowest = max(slowest, elapsed)
+        step(state, action)
+    return state, thinking, slowest
+
+
+def main(argv):
+    """python -m src.autopilot [--games N] [--ticks N] [--seed N] [--size WxH]
+
+    Soak test: plays autopilot games headless and reports how they ended.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src.autopilot", description="Play headless autopilot games.")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--ticks", type=int, default=SOAK_TICKS, help="stop a game after this many ticks")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first game (default: random)")
+    parser.add_argument("--size", default=f"{GRID_WIDTH}x{GRID_HEIGHT}", help="board size in cells, e.g. 100x100")
+    args = parser.parse_args(argv)
+    grid_width, grid_height = (int(v) for v in args.size.lower().split("x"))
+
+    autopilot = Autopilot(grid_width, grid_height)
+    total_ticks = 0
+    total_thinking = 0.0
+    slowest = 0.0
+    deaths = 0
+    for i in range(args.games):
+        seed = new_seed() if args.seed is None else args.seed + i
+        state, thinking, game_slowest = play(seed, args.ticks, grid_width, grid_height, autopilot)
+        total_ticks += state.tick
+        total_thinking += thinking
+        slowest = max(slowest, game_slowest)
+        deaths += START_LIVES - max(state.lives, 0)
+        ending = "won" if state.won else "game over" if state.game_over else "time up"
+        print(f"seed {seed}: {ending} after {state.tick} ticks, score {state.score}, "
+              f"length {state.snake.length}, lives {state.lives}")
+    if total_ticks:
+        print(f"{total_ticks} ticks, {deaths} lives lost, {total_thinking / total_ticks * 1e6:.0f} us per decision "
+              f"on average, slowest {slowest * 1e3:.1f} ms")
+    return 1 if deaths else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
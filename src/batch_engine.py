@@ -0,0 +1,258 @@
+import numpy as np
+from src.constants import GRID_SIZE, GRID_WIDTH, GRID_HEIGHT
+from src import engine
+from src.engine import START_LIVES, FOOD_SCORE, STOPPED, neighbour_table
+
+# Vectorized twin of src/engine.py: N independent games advanced in lockstep
+# with NumPy. Needs numpy (requirements-dev.txt); the game itself doesn't.
+
+# Action and direction codes: engine.DIRECTIONS, then STOPPED
+DIRECTIONS = engine.DIRECTIONS + (STOPPED,)
+NO_ACTION = -1
+STOPPED_CODE = 4
+
+# Random picks per food before counting the free cells
+FOOD_TRIES = 4
+
+# Board cells hold 0 when free and 1 + a direction code when taken: the
+# direction the snake left by for a body cell, its current one for the head
+MARKS = 1 + len(DIRECTIONS)
+
+# Code of the opposite direction; STOPPED has none
+_REVERSE = engine.REVERSE + (None,)
+
+# _TURNS[direction * 5 + action + 1] is the direction after SnakeModel.turn()
+# (length is never below 3, so reversing is always refused)
+_TURNS = np.array([direction if action == NO_ACTION or action == _REVERSE[direction] else action
+                   for direction in range(len(DIRECTIONS)) for action in range(NO_ACTION, 4)], dtype=np.int8)
+
+
+class BatchGames:
+    """N games as flat arrays, stepped together by step(actions).
+
+    Every game follows the rules of engine.step(): wrap-around moves,
+    self-hits, growth and FOOD_SCORE per food, uniform food placement on
+    free cells, and lives with a reset to the start cell. Per game: head
+    and tail cells, a board whose cells say which way the body goes on
+    (so the tail follows it without a body buffer), direction, length,
+    food cell, lives, score, tick, game_over and won. Food comes from one numpy
+    Generator, so the batch is reproducible from its seed but does not
+    draw the same food as a scalar game would.
+    """
+
+    def __init__(self, n, seed=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, lives=START_LIVES):
+        if grid_width < 3 or grid_height < 3:
+            raise ValueError("BatchGames needs a board of at least 3x3 cells")
+        self.n = n
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.capacity = grid_width * grid_height
+        self.start_lives = lives
+        self.rng = np.random.default_rng(seed)
+        # Indices are intp so take() and fancy assignment don't convert them
+        rows = np.arange(n, dtype=np.intp)
+        self.offsets = rows * self.capacity # Start of each game's board
+
+        # next_cell[cell * MARKS + mark] is the cell reached by following a
+        # board mark, wrap included (a free or STOPPED mark stays put)
+        next_cell = np.empty((self.capacity, MARKS), dtype=np.intp)
+        next_cell[:, 0] = next_cell[:, 1 + STOPPED_CODE] = np.arange(self.capacity)
+        next_cell[:, 1:1 + STOPPED_CODE] = np.frombuffer(neighbour_table(grid_width, grid_height), dtype=np.int32).reshape(-1, 4)
+        self.next_cell = next_cell.ravel()
+
+        # On a board of 3x3 or more segments never share a cell. full() rather
+        # than zeros() so the pages are touched now, not mid-step
+        self.board = np.full(n * self.capacity, 0, dtype=np.int8)
+
+        self.head = np.zeros(n, dtype=np.intp)
+        self.tail = np.zeros(n, dtype=np.intp)
+        self.size = np.zeros(n, dtype=np.intp)
+        self.length = np.zeros(n, dtype=np.intp)
+        self.direction = np.full(n, STOPPED_CODE, dtype=np.int8)
+        self.food = np.zeros(n, dtype=np.intp) # -1 once the board is full
+        self.lives = np.full(n, lives, dtype=np.int32)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.steps = 0
+        self.ended = np.zeros(n, dtype=np.int64) # tick when game_over was set
+        self.game_over = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+
+        self.reset_position(rows)
+        # Like FoodModel(), the first food may land anywhere, even on the snake
+        self.food[:] = self.rng.integers(0, self.capacity, size=n)
+
+    @property
+    def tick(self):
+        """Ticks each game has played (a copy): every step, up to its game over."""
+        return np.where(self.game_over, self.ended, self.steps)
+
+    @property
+    def occupancy(self):
+        """Occupied cells as an (n, grid_height, grid_width) array of 0 and 1 (a copy)."""
+        return (self.board != 0).view(np.uint8).reshape(self.n, self.grid_height, self.grid_width)
+
+    def start_cell(self):
+        return (self.grid_height // 2) * self.grid_width + self.grid_width // 2
+
+    def reset_position(self, games):
+        """engine.SnakeModel.reset_position for the given game indices."""
+        self.board.reshape(self.n, self.capacity)[games] = 0
+        start = self.start_cell()
+        self.board[self.offsets[games] + start] = 1 + STOPPED_CODE
+        self.head[games] = start
+        self.tail[games] = start
+        self.size[games] = 1
+        self.length[games] = 3
+        self.direction[games] = STOPPED_CODE
+
+    def step(self, actions=None):
+        """Advance every game that isn't over by one tick.
+
+        actions is an int array of direction codes (0-3 as in DIRECTIONS)
+        or NO_ACTION per game, or None to keep every snake going.
+        Returns the indices of games that ate food this tick.
+        """
+        # Finished games only need masking out once there are some
+        active = ~self.game_over if self.game_over.any() else None
+        board = self.board
+        offsets = self.offsets
+        head = self.head
+        direction = self.direction
+        if actions is not None:
+            turned = _TURNS.take(direction * 5 + np.asarray(actions) + 1)
+            if active is not None:
+                turned = np.where(active, turned, direction)
+            # Only a few snakes turn each tick, so re-mark just their heads
+            changed = np.flatnonzero(turned != direction)
+            board[offsets[changed] + head[changed]] = turned[changed] + 1
+            self.direction = direction = turned
+
+        # Whole-array passes rather than index lists. Any segment on the new
+        # cell is a hit: without reversing, the head can't reach its own cell
+        # or the neck's, which SnakeModel.move() skips. Stopped and finished
+        # games stay on their head cell, and every game writes back the mark
+        # it read unless it moves on
+        mark = direction + 1
+        new = self.next_cell.take(head * MARKS + mark)
+        moving = new != head
+        if active is not None:
+            moving &= active
+        new_index = offsets + new
+        hit = board.take(new_index)
+        dead = moving & (hit != 0)
+        go = moving ^ dead
+        board[new_index] = hit + mark * go
+        self.head = np.where(go, new, head)
+        size = self.size + go
+
+        # Move the tail on where the snake is longer than its length (only
+        # movers can be), following the mark it leaves behind
+        shrink = size > self.length
+        tail = self.tail
+        tail_index = offsets + tail
+        way = board.take(tail_index)
+        board[tail_index] = way * ~shrink
+        self.tail = self.next_cell.take(tail * MARKS + way * shrink)
+        self.size = size - shrink
+
+        if dead.any():
+            died = np.flatnonzero(dead)
+            lives = self.lives[died] - 1
+            self.lives[died] = lives
+            over = died[lives <= 0]
+            self.game_over[over] = True
+            self.ended[over] = self.steps + 1
+            self.reset_position(died[lives > 0])
+            # Games that just ended skip the food check, as in engine.step()
+            moving &= ~self.game_over
+
+        eaten = np.flatnonzero(moving & (self.head == self.food))
+        if len(eaten):
+            self.length[eaten] += 1
+            self.score[eaten] += FOOD_SCORE
+            self.place_food(eaten)
+
+        self.steps += 1
+        return eaten
+
+    def place_food(self, games):
+        """FoodModel.randomize_position for the given games: a uniform free cell."""
+        # Random cells until one is free is uniform over the free cells and,
+        # unless the snake covers most of the board, done in a try or two
+        for _ in range(FOOD_TRIES):
+            cells = self.rng.integers(0, self.capacity, size=len(games))
+            free = self.board[self.offsets[games] + cells] == 0
+            self.food[games[free]] = cells[free]
+            games = games[~free]
+            if not len(games):
+                return
+
+        free = self.board.reshape(self.n, self.capacity)[games] == 0
+        counts = free.sum(axis=1)
+        full = counts == 0
+        if full.any():
+            # No free cell left: the snake fills the board
+            self.food[games[full]] = -1
+            self.won[games[full]] = True
+            self.game_over[games[full]] = True
+            self.ended[games[full]] = self.steps + 1
+            games, free, counts = games[~full], free[~full], counts[~full]
+        if len(games):
+            picks = (self.rng.random(len(games)) * counts).astype(np.int64)
+            # Index of the (pick + 1)-th free cell in each row
+            self.food[games] = np.argmax(np.cumsum(free, axis=1) > picks[:, None], axis=1)
+
+    def snake_cells(self, game):
+        """Body cells of one game, head first (for checks and debugging)."""
+        board = self.board[self.offsets[game]:self.offsets[game] + self.capacity]
+        cells = [int(self.tail[game])]
+        while len(cells) < self.size[game]:
+            cells.append(int(self.next_cell[cells[-1] * MARKS + int(board[cells[-1]])]))
+        return np.array(cells[::-1], dtype=np.intp)
+
+
+def check_against_engine(games, steps, seed, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, turn_rate=0.3):
+    """Play random inputs through BatchGames and engine.step side by side.
+
+    The scalar games get their food copied from the batch, since the two
+    draw food from different generators. Raises AssertionError at the
+    first game whose state differs; returns (games over, games won).
+    """
+    rng = np.random.default_rng(seed)
+    batch = BatchGames(games, seed=seed, grid_width=grid_width, grid_height=grid_height)
+    states = [engine.new_game(seed * games + i, grid_width=grid_width, grid_height=grid_height) for i in range(games)]
+
+    def copy_food(state, cell):
+        food = state.food
+        food.cell = int(cell)
+        y, x = divmod(food.cell, grid_width)
+        food.position = (x * GRID_SIZE, y * GRID_SIZE)
+
+    for i, state in enumerate(states):
+        copy_food(state, batch.food[i])
+
+    for t in range(steps):
+        actions = rng.integers(0, 4, size=games).astype(np.int8)
+        actions[rng.random(games) >= turn_rate] = NO_ACTION
+        eaten = batch.step(actions)
+        for state, action in zip(states, actions):
+            engine.step(state, DIRECTIONS[action] if action != NO_ACTION else None)
+        for i in eaten:
+            if batch.food[i] >= 0:
+                copy_food(states[i], batch.food[i])
+
+        tick = batch.tick
+        for i, state in enumerate(states):
+            snake = state.snake
+            expected = (snake.head_cell, snake.size, snake.length, DIRECTIONS.index(snake.direction),
+                        state.lives, state.score, state.tick, state.game_over, state.won)
+            actual = (batch.head[i], batch.size[i], batch.length[i], batch.direction[i],
+                      batch.lives[i], batch.score[i], tick[i], batch.game_over[i], batch.won[i])
+            if tuple(int(v) for v in expected) != tuple(int(v) for v in actual):
+                raise AssertionError(f"game {i} differs at step {t}: scalar {expected}, batch {actual}")
+            if t % 25 == 0 or state.game_over:
+                if bytes(snake.occupancy) != batch.occupancy[i].tobytes():
+                    raise AssertionError(f"game {i} occupancy differs at step {t}")
+                if [snake.cell_at(k) for k in range(snake.size)] != batch.snake_cells(i).tolist():
+                    raise AssertionError(f"game {i} body differs at step {t}")
+    return sum(state.game_over for state in states), sum(state.won for state in states)
@@ -27,6 +27,9 @@ BUTTON_RADIUS = 10
 
 # Game Settings
 FPS = 15
+RENDER_FPS = 60 # Used when the display's refresh rate is unknown
+INPUT_BUFFER = 3 # Turns queued ahead of the simulation
+MAX_CATCH_UP_STEPS = 5 # After a stall, steps run at once before the backlog is dropped
 CAPTION = "Maze Runner"
 SNAKE_SPEED = 15
 
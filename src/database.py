@@ -1,23 +1,305 @@
 import os
 import sys
 import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
 import psycopg2
-from psycopg2 import sql
-from dotenv import load_dotenv
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import execute_values
+from src.constants import DIFFICULTY
+from src.migrations import migrate
 
-# Robustly find .env file
-if getattr(sys, 'frozen', False):
-    # If the application is run as a bundle (PyInstaller)
-    application_path = os.path.dirname(sys.executable)
-else:
-    # If run from source
-    application_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_env_loaded = False
+
+def load_env():
+    """Read DB_* settings from the .env next to the app, once."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    from dotenv import load_dotenv
+
+    # Robustly find .env file
+    if getattr(sys, 'frozen', False):
+        # If the application is run as a bundle (PyInstaller)
+        application_path = os.path.dirname(sys.executable)
+    else:
+        # If run from source
+        application_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    dotenv_path = os.path.join(application_path, '.env')
+    load_dotenv(dotenv_path)
+
+# Upsert for client-submitted scores. The upload key identifies one local
+# score: re-sending the same key is a no-op, and a lower score never
+# replaces a higher one, so retried uploads are safe. A new best (or any
+# score replacing one the verifier rejected) brings its replay along and
+# goes back to 'pending' until src/verify.py has re-simulated it.
+UPSERT_SCORE_SQL = """
+INSERT INTO scores (username, score, difficulty, upload_key, replay)
+{rows}
+ON CONFLICT (username, difficulty)
+DO UPDATE SET score = CASE WHEN {replaces} THEN EXCLUDED.score ELSE scores.score END,
+              upload_key = CASE WHEN {replaces} THEN EXCLUDED.upload_key ELSE scores.upload_key END,
+              created_at = CASE WHEN {replaces} THEN CURRENT_TIMESTAMP ELSE scores.created_at END,
+              replay = CASE WHEN {replaces} THEN EXCLUDED.replay ELSE scores.replay END,
+              verification = CASE WHEN {replaces} THEN 'pending' ELSE scores.verification END,
+              verified_at = CASE WHEN {replaces} THEN NULL ELSE scores.verified_at END
+WHERE scores.upload_key IS DISTINCT FROM EXCLUDED.upload_key
+""".replace("{replaces}", "(EXCLUDED.score > scores.score OR scores.verification = 'rejected')")
+
+# Server-side prepared statements: name -> (parameter types, query).
+# Each pooled connection prepares a statement the first time it runs it.
+PREPARED_STATEMENTS = {
+    "upsert_score": (
+        "(varchar, integer, varchar, varchar, bytea)",
+        UPSERT_SCORE_SQL.format(rows="VALUES ($1, $2, $3, $4, $5)"),
+    ),
+    # The batch upload from SyncEngine: one array per column, so a single
+    # prepared statement covers any number of rows
+    "upsert_scores": (
+        "(varchar[], integer[], varchar[], varchar[], bytea[])",
+        UPSERT_SCORE_SQL.format(rows="SELECT * FROM unnest($1, $2, $3, $4, $5)"),
+    ),
+    # Scores the verifier rejected are left out of every leaderboard query
+    # The overall list is the best of each difficulty's top $1 (for the
+    # difficulties in DIFFICULTY), so every branch is a short walk of
+    # idx_scores_rank instead of a sort of the whole table:
+    #   Limit -> Sort -> Append -> Limit -> Index Scan using idx_scores_rank
+    "top_scores": (
+        "(integer)",
+        "SELECT username, score, difficulty FROM ("
+        + " UNION ALL ".join(
+            f"""
+            (SELECT username, score, difficulty FROM scores
+             WHERE difficulty = '{name}' AND verification <> 'rejected'
+             ORDER BY score DESC, created_at, id
+             LIMIT $1)"""
+            for name in DIFFICULTY)
+        + ") AS best ORDER BY score DESC LIMIT $1",
+    ),
+    # Per-difficulty queries below walk idx_scores_rank in order, so
+    # their cost depends on the rows returned, not on the table size:
+    #   Limit -> Index Scan using idx_scores_rank on scores
+    #            Index Cond: (difficulty = $1) [AND score <= $2]
+    #            Filter: (verification <> 'rejected')
+    "top_scores_difficulty": (
+        "(varchar, integer)",
+        """
+        SELECT username, score, difficulty FROM scores
+        WHERE difficulty = $1 AND verification <> 'rejected'
+        ORDER BY score DESC, created_at, id
+        LIMIT $2
+        """,
+    ),
+    # Keyset pagination: the cursor is the (score, created_at, id) of the
+    # last row on the previous page. score <= $2 is the index condition;
+    # the second clause only filters out ties already shown.
+    "scores_page": (
+        "(varchar, integer, timestamp, integer, integer)",
+        """
+        SELECT id, username, score, difficulty, created_at FROM scores
+        WHERE difficulty = $1
+          AND score <= $2
+          AND (score < $2 OR (created_at, id) > ($3, $4))
+          AND verification <> 'rejected'
+        ORDER BY score DESC, created_at, id
+        LIMIT $5
+        """,
+    ),
+    "scores_first_page": (
+        "(varchar, integer)",
+        """
+        SELECT id, username, score, difficulty, created_at FROM scores
+        WHERE difficulty = $1 AND verification <> 'rejected'
+        ORDER BY score DESC, created_at, id
+        LIMIT $2
+        """,
+    ),
+    # Rank = players with a strictly higher score + 1, an index-only scan
+    # over the part of idx_scores_rank above the player:
+    #   Aggregate -> Index Only Scan using idx_scores_rank
+    #                Index Cond: ((difficulty = $2) AND (score > s.score))
+    #                Filter: (verification <> 'rejected')
+    "player_rank": (
+        "(varchar, varchar)",
+        """
+        SELECT s.score,
+               (SELECT count(*) FROM scores h
+                WHERE h.difficulty = $2 AND h.score > s.score AND h.verification <> 'rejected') + 1
+        FROM scores s
+        WHERE s.username = $1 AND s.difficulty = $2
+        """,
+    ),
+    # Players on a difficulty. This scans all of its rows, so Database
+    # caches the result for PLAYER_COUNT_TTL instead of counting per lookup
+    "player_count": (
+        "(varchar)",
+        "SELECT count(*) FROM scores WHERE difficulty = $1 AND verification <> 'rejected'",
+    ),
+}
+
+
+# Seconds a difficulty's player count is reused for ranks
+PLAYER_COUNT_TTL = 300
+
+
+class PoolExhaustedError(Exception):
+    """No pooled connection became free before the acquire timeout."""
+
+
+class PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.prepared = set() # Names of statements prepared on this session
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Small thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily, at most maxconn at a time. A connection
+    that sat idle for more than check_after seconds is pinged before reuse,
+    and one idle for more than idle_timeout seconds is closed. Callers that
+    find every connection busy wait up to acquire_timeout seconds and then
+    get PoolExhaustedError; status() exposes the counters for all of this.
+    """
+
+    def __init__(self, connect, maxconn=4, idle_timeout=300, check_after=30, acquire_timeout=15):
+        self._connect = connect
+        self.maxconn = maxconn
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = [] # Oldest first, most recently released last
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "discarded": 0, "evicted": 0, "waits": 0, "exhausted": 0}
+
+    def status(self):
+        with self._cond:
+            status = dict(self.stats)
+            status["in_use"] = self._in_use
+            status["idle"] = len(self._idle)
+            status["maxconn"] = self.maxconn
+        return status
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            stale = self._evict_idle_locked()
+            while True:
+                if self._idle:
+                    pc = self._idle.pop()
+                    break
+                if self._in_use < self.maxconn:
+                    pc = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["exhausted"] += 1
+                    logging.warning(f"Database pool exhausted ({self.maxconn} connections busy)")
+                    raise PoolExhaustedError(f"all {self.maxconn} database connections are busy")
+                self.stats["waits"] += 1
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        for old in stale:
+            self._close(old)
+
+        try:
+            if pc is not None and not self._healthy(pc):
+                self._close(pc)
+                with self._cond:
+                    self.stats["discarded"] += 1
+                pc = None
+            if pc is None:
+                pc = PooledConnection(self._connect())
+                with self._cond:
+                    self.stats["created"] += 1
+            else:
+                with self._cond:
+                    self.stats["reused"] += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return pc
+
+    def release(self, pc, broken=False):
+        pc.last_used = time.monotonic()
+        if not broken and not pc.conn.closed:
+            try:
+                if pc.conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    pc.conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        else:
+            broken = True
+
+        if broken:
+            self._close(pc)
+        with self._cond:
+            if broken:
+                self.stats["discarded"] += 1
+            else:
+                self._idle.append(pc)
+            self._in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        pc = self.acquire(timeout)
+        broken = False
+        try:
+            yield pc
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(pc, broken)
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pc in idle:
+            self._close(pc)
+
+    def _healthy(self, pc):
+        if pc.conn.closed:
+            return False
+        if time.monotonic() - pc.last_used < self.check_after:
+            return True
+        try:
+            with pc.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            pc.conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        stale = []
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            stale.append(self._idle.pop(0))
+            self.stats["evicted"] += 1
+        return stale
+
+    def _close(self, pc):
+        try:
+            pc.conn.close()
+        except psycopg2.Error:
+            pass
 
-dotenv_path = os.path.join(application_path, '.env')
-load_dotenv(dotenv_path)
 
 class Database:
     def __init__(self):
+        load_env()
         self.conn_params = {
             "host": os.getenv("DB_HOST", "localhost"),
             "port": os.getenv("DB_PORT", "5432"),
@@ -27,120 +309,254 @@ class Database:
             "sslmode": os.getenv("DB_SSLMODE", "prefer"),
         }
         self.connected = False
+        self.player_counts = {} # difficulty -> (count, fetched_at)
+        # One pool per Database, shared by every thread Leaderboard starts
+        self.pool = ConnectionPool(self._open_connection, maxconn=int(os.getenv("DB_POOL_SIZE", "4")))
+
+    def _open_connection(self):
+        # Set connect_timeout to allow waking up sleeping DBs (e.g. Neon)
+        return psycopg2.connect(**self.conn_params, connect_timeout=10)
 
     def get_connection(self, timeout=10):
+        """Open a standalone connection outside the pool."""
         try:
-            # Set connect_timeout to allow waking up sleeping DBs (e.g. Neon)
             conn = psycopg2.connect(**self.conn_params, connect_timeout=timeout)
             return conn
         except psycopg2.Error as e:
-            print(f"Connection failed: {e}")
+            logging.warning(f"Connection failed: {e}")
             return None
 
+    def execute_prepared(self, pc, cur, name, args):
+        """Run one of PREPARED_STATEMENTS on a pooled connection."""
+        if name not in pc.prepared:
+            types, query = PREPARED_STATEMENTS[name]
+            cur.execute(f"PREPARE {name} {types} AS {query}")
+            pc.prepared.add(name)
+        placeholders = ", ".join(["%s"] * len(args))
+        cur.execute(f"EXECUTE {name} ({placeholders})", args)
+
     def connect(self):
-        """Explicitly connect and initialize the database table with retries."""
+        """Explicitly connect and bring the schema up to date, with retries."""
         max_retries = 3
         for attempt in range(max_retries):
-            print(f"Connecting to database (Attempt {attempt+1}/{max_retries})...")
-            conn = self.get_connection(timeout=10)
-            if conn:
-                try:
-                    with conn.cursor() as cur:
-                        # Create table if not exists
-                        cur.execute("""
-                            CREATE TABLE IF NOT EXISTS scores (
-                                id SERIAL PRIMARY KEY,
-                                username VARCHAR(50) NOT NULL,
-                                score INTEGER NOT NULL,
-                                difficulty VARCHAR(20) DEFAULT 'Medium',
-                                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                            );
-                        """)
-                        
-                        # Add difficulty column if it doesn't exist (migration)
-                        cur.execute("""
-                            ALTER TABLE scores ADD COLUMN IF NOT EXISTS difficulty VARCHAR(20) DEFAULT 'Medium';
-                        """)
-                        
-                        # Add unique constraint for username + difficulty
-                        # We use a unique index to support ON CONFLICT
-                        cur.execute("""
-                            CREATE UNIQUE INDEX IF NOT EXISTS idx_scores_user_diff 
-                            ON scores (username, difficulty);
-                        """)
-                        
-                        conn.commit()
-                    self.connected = True
-                    print("Database initialized successfully.")
-                    return
-                except psycopg2.Error as e:
-                    print(f"Error initializing database: {e}")
-                finally:
-                    conn.close()
-            else:
-                print("Connection attempt failed.")
-            
+            logging.info(f"Connecting to database (Attempt {attempt+1}/{max_retries})...")
+            try:
+                # The connection stays in the pool afterwards, warm for the first query
+                with self.pool.connection() as pc:
+                    # One version check; DDL only runs when the schema is behind
+                    applied = migrate(pc.conn)
+                if applied:
+                    logging.info(f"Database schema migrated to version {applied[-1]}.")
+                self.connected = True
+                logging.info("Database initialized successfully.")
+                return
+            except psycopg2.OperationalError as e:
+                logging.warning(f"Connection failed: {e}")
+                logging.warning("Connection attempt failed.")
+            except psycopg2.Error as e:
+                logging.error(f"Error initializing database: {e}")
+            except PoolExhaustedError as e:
+                logging.warning(f"Connection attempt failed: {e}")
+
             # Wait before retrying (exponential backoff: 1s, 2s, 4s...)
             if attempt < max_retries - 1:
                 time.sleep(2 ** attempt)
 
-        print("Could not connect to database after retries. Leaderboard will be disabled.")
+        logging.error("Could not connect to database after retries.")
 
-    def add_score(self, username, score, difficulty="Medium"):
+    def add_score(self, username, score, difficulty="Medium", upload_key=None, replay=None):
         if not self.connected:
             return False
-        
+        if upload_key is None:
+            upload_key = uuid.uuid4().hex
+
         max_retries = 3
         for attempt in range(max_retries):
-            conn = self.get_connection()
-            if conn:
-                try:
-                    with conn.cursor() as cur:
+            try:
+                with self.pool.connection() as pc:
+                    with pc.conn.cursor() as cur:
                         # Upsert: Insert or Update if higher
-                        cur.execute(
-                            """
-                            INSERT INTO scores (username, score, difficulty) 
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (username, difficulty) 
-                            DO UPDATE SET score = GREATEST(scores.score, EXCLUDED.score),
-                                          created_at = CURRENT_TIMESTAMP
-                            """,
-                            (username, score, difficulty)
-                        )
-                        conn.commit()
-                        print(f"Score saved: {username} - {score} ({difficulty})")
-                    return True
-                except psycopg2.Error as e:
-                    print(f"Error adding score: {e}")
-                finally:
-                    conn.close()
-            
+                        self.execute_prepared(pc, cur, "upsert_score", (username, score, difficulty, upload_key, replay))
+                        pc.conn.commit()
+                        logging.info(f"Score saved: {username} - {score} ({difficulty})")
+                return True
+            except psycopg2.Error as e:
+                logging.error(f"Error adding score: {e}")
+            except PoolExhaustedError as e:
+                logging.error(f"Error adding score: {e}")
+
             if attempt < max_retries - 1:
                 time.sleep(1) # Short wait before retry
-                
+
         return False
 
-    def get_top_scores(self, limit=10):
+    def add_scores(self, rows):
+        """Upsert many (username, score, difficulty, upload_key, replay) rows in one round trip.
+
+        The rows go to the prepared upsert_scores as one array per column.
+        Each (username, difficulty) may appear only once in rows. Makes a
+        single attempt; the caller decides whether and when to retry.
+        """
         if not self.connected:
-            return []
-            
-        max_retries = 3
+            return False
+        if not rows:
+            return True
+
+        try:
+            with self.pool.connection() as pc:
+                with pc.conn.cursor() as cur:
+                    self.execute_prepared(pc, cur, "upsert_scores", [list(column) for column in zip(*rows)])
+                pc.conn.commit()
+            logging.info(f"Saved {len(rows)} score(s)")
+            return True
+        except psycopg2.Error as e:
+            logging.error(f"Error adding scores: {e}")
+        except PoolExhaustedError as e:
+            logging.error(f"Error adding scores: {e}")
+        return False
+
+    def pending_verifications(self, limit=500):
+        """Scores waiting for the verifier, oldest first.
+
+        Rows are (id, upload_key, score, difficulty, replay bytes or None).
+        Returns None if the query failed.
+        """
+        try:
+            with self.pool.connection() as pc:
+                with pc.conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT id, upload_key, score, difficulty, replay FROM scores
+                        WHERE verification = 'pending'
+                        ORDER BY id
+                        LIMIT %s
+                        """,
+                        (limit,),
+                    )
+                    rows = cur.fetchall()
+                pc.conn.rollback()
+        except (psycopg2.Error, PoolExhaustedError) as e:
+            logging.error(f"Error fetching pending scores: {e}")
+            return None
+        return [(row_id, key, score, difficulty, bytes(replay) if replay is not None else None)
+                for row_id, key, score, difficulty, replay in rows]
+
+    def record_verifications(self, results):
+        """Store verdicts as (id, upload_key, 'verified' or 'rejected') rows.
+
+        A row is only updated if its upload key still matches, so a score
+        that improved while being checked stays pending for its new replay.
+        Rows uploaded without a key (older clients) match on NULL.
+        Returns the number of rows updated, or None on failure.
+        """
+        if not results:
+            return 0
+        try:
+            with self.pool.connection() as pc:
+                with pc.conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        """
+                        UPDATE scores AS s
+                        SET verification = v.status, verified_at = CURRENT_TIMESTAMP
+                        FROM (VALUES %s) AS v (id, upload_key, status)
+                        WHERE s.id = v.id AND s.upload_key IS NOT DISTINCT FROM v.upload_key AND s.verification = 'pending'
+                        """,
+                        results,
+                        page_size=len(results),
+                    )
+                    updated = cur.rowcount
+                pc.conn.commit()
+            return updated
+        except (psycopg2.Error, PoolExhaustedError) as e:
+            logging.error(f"Error saving verification results: {e}")
+            return None
+
+    def fetch_prepared(self, name, args, max_retries=3):
+        """Run a read-only prepared statement. Returns the rows, or None if every attempt failed."""
+        if not self.connected:
+            return None
+
         for attempt in range(max_retries):
-            conn = self.get_connection()
-            if conn:
-                try:
-                    with conn.cursor() as cur:
-                        cur.execute(
-                            "SELECT username, score, difficulty FROM scores ORDER BY score DESC LIMIT %s",
-                            (limit,)
-                        )
-                        return cur.fetchall()
-                except psycopg2.Error as e:
-                    print(f"Error fetching scores: {e}")
-                finally:
-                    conn.close()
-            
+            try:
+                with self.pool.connection() as pc:
+                    with pc.conn.cursor() as cur:
+                        self.execute_prepared(pc, cur, name, args)
+                        rows = cur.fetchall()
+                    pc.conn.rollback() # End the read-only transaction
+                    return rows
+            except psycopg2.Error as e:
+                logging.error(f"Error fetching scores: {e}")
+            except PoolExhaustedError as e:
+                logging.error(f"Error fetching scores: {e}")
+
             if attempt < max_retries - 1:
                 time.sleep(1) # Short wait before retry
-                
-        return []
+
+        return None
+
+    def get_top_scores(self, limit=10, difficulty=None):
+        """Top scores as (username, score, difficulty) rows, or None if the query failed.
+
+        With a difficulty only that leaderboard is returned.
+        """
+        if not self.connected:
+            return []
+        if difficulty is None:
+            return self.fetch_prepared("top_scores", (limit,))
+        return self.fetch_prepared("top_scores_difficulty", (difficulty, limit))
+
+    def get_scores_page(self, difficulty, after=None, limit=10):
+        """One page of a difficulty's leaderboard, best first.
+
+        after is the cursor of the previous page (the last row's
+        (score, created_at, id)), or None for the first page. Rows are
+        (id, username, score, difficulty, created_at); None on failure.
+        """
+        if after is None:
+            return self.fetch_prepared("scores_first_page", (difficulty, limit), max_retries=1)
+        score, created_at, row_id = after
+        return self.fetch_prepared("scores_page", (difficulty, score, created_at, row_id, limit), max_retries=1)
+
+    def get_player_rank(self, username, difficulty):
+        """(score, rank, total players) for username on difficulty.
+
+        The total comes from player_count(), so it can be a few minutes old.
+        Returns () if the player has no score there and None on failure.
+        """
+        rows = self.fetch_prepared("player_rank", (username, difficulty), max_retries=1)
+        if rows is None:
+            return None
+        if not rows:
+            return ()
+        score, rank = rows[0]
+        total = self.player_count(difficulty)
+        if total is None:
+            return None
+        # The count may predate the player's first score
+        return (score, rank, max(total, rank))
+
+    def player_count(self, difficulty):
+        """Players with a score on difficulty, at most PLAYER_COUNT_TTL seconds old; None on failure."""
+        cached = self.player_counts.get(difficulty)
+        if cached is not None and time.monotonic() - cached[1] < PLAYER_COUNT_TTL:
+            return cached[0]
+        rows = self.fetch_prepared("player_count", (difficulty,), max_retries=1)
+        if rows is None:
+            return None
+        self.player_counts[difficulty] = (rows[0][0], time.monotonic())
+        return rows[0][0]
+
+    def explain(self, name, args):
+        """EXPLAIN output of a prepared statement, for checking plans on big tables."""
+        with self.pool.connection() as pc:
+            with pc.conn.cursor() as cur:
+                self.execute_prepared(pc, cur, name, args) # Makes sure it is prepared
+                placeholders = ", ".join(["%s"] * len(args))
+                cur.execute(f"EXPLAIN EXECUTE {name} ({placeholders})", args)
+                plan = [row[0] for row in cur.fetchall()]
+            pc.conn.rollback()
+        return plan
+
+    def close(self):
+        self.pool.close_all()
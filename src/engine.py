@@ -0,0 +1,336 @@
+import random
+from array import array
+from collections.abc import Sequence
+from src.constants import GRID_SIZE, GRID_WIDTH, GRID_HEIGHT
+
+# Headless game rules. Nothing in here touches pygame, so the game can be
+# advanced as fast as the CPU allows for tests, bots and score checks.
+# Snake and Food (src/snake.py, src/food.py) add drawing on top of these models.
+
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+STOPPED = (0, 0)
+
+# Direction codes, as stored in replays and used by the bots and the batch engine
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+REVERSE = (1, 0, 3, 2) # Code of the opposite direction
+
+START_LIVES = 3
+FOOD_SCORE = 10
+
+# Events reported by step()
+EVENT_FOOD = "food"
+EVENT_DIED = "died"
+EVENT_GAME_OVER = "game_over"
+EVENT_WIN = "win"
+
+
+class FreeCells:
+    """Cells not covered by the snake, as a swap-remove array plus a slot map.
+
+    cells[:count] holds the free cell indices in no particular order and
+    slots[cell] is where that cell sits in cells (-1 while occupied), so add,
+    remove and a uniform random pick are all O(1) however full the board is.
+    """
+
+    def __init__(self, capacity):
+        self.cells = array('i', range(capacity))
+        self.slots = array('i', range(capacity))
+        self.count = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, cell):
+        return self.slots[cell] >= 0
+
+    def remove(self, cell):
+        slot = self.slots[cell]
+        if slot < 0:
+            return
+        self.count -= 1
+        last = self.cells[self.count]
+        self.cells[slot] = last
+        self.slots[last] = slot
+        self.cells[self.count] = cell
+        self.slots[cell] = -1
+
+    def add(self, cell):
+        if self.slots[cell] >= 0:
+            return
+        self.cells[self.count] = cell
+        self.slots[cell] = self.count
+        self.count += 1
+
+    def choice(self, rng):
+        if not self.count:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+
+class SnakePositions(Sequence):
+    """Read-only view of the snake body as pixel tuples, head first.
+
+    Built on demand from the ring buffer so draw code and Food keep working
+    with (x, y) positions while the model itself only stores cell indices.
+    """
+
+    def __init__(self, snake):
+        self.snake = snake
+
+    @property
+    def free_cells(self):
+        return self.snake.free_cells
+
+    def __len__(self):
+        return self.snake.size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.snake.size))]
+        if index < 0:
+            index += self.snake.size
+        if not 0 <= index < self.snake.size:
+            raise IndexError("snake position index out of range")
+        return self.snake.cell_to_pixel(self.snake.cell_at(index))
+
+    def __iter__(self):
+        snake = self.snake
+        for i in range(snake.size):
+            yield snake.cell_to_pixel(snake.cell_at(i))
+
+    def __contains__(self, position):
+        # O(1) through the occupancy grid instead of a list scan
+        cell = self.snake.pixel_to_cell(position)
+        return cell is not None and self.snake.occupancy[cell] > 0
+
+    def __repr__(self):
+        return f"SnakePositions({list(self)!r})"
+
+
+class SnakeModel:
+    """Snake body kept as a ring buffer of cell indices plus an occupancy grid.
+
+    A cell index is y * grid_width + x. occupancy[cell] counts the body
+    segments on that cell, so moving the head, dropping the tail and checking
+    for self-hits are all constant time regardless of the snake's length.
+    """
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.capacity = grid_width * grid_height
+        self.cells = array('i', bytes(4 * self.capacity))
+        self.occupancy = bytearray(self.capacity)
+        self.free_cells = FreeCells(self.capacity)
+        self.head_index = 0
+        self.size = 0
+        self.positions = SnakePositions(self)
+        self.reset()
+
+    def reset(self):
+        self.reset_position()
+        self.score = 0
+
+    def cell_at(self, index):
+        return self.cells[(self.head_index + index) % self.capacity]
+
+    @property
+    def head_cell(self):
+        return self.cells[self.head_index]
+
+    @property
+    def tail_cell(self):
+        return self.cell_at(self.size - 1)
+
+    def start_cell(self):
+        return (self.grid_height // 2) * self.grid_width + self.grid_width // 2
+
+    def cell_to_pixel(self, cell):
+        y, x = divmod(cell, self.grid_width)
+        return (x * GRID_SIZE, y * GRID_SIZE)
+
+    def pixel_to_cell(self, position):
+        x = position[0] // GRID_SIZE
+        y = position[1] // GRID_SIZE
+        if 0 <= x < self.grid_width and 0 <= y < self.grid_height:
+            return y * self.grid_width + x
+        return None
+
+    def get_head_position(self):
+        return self.cell_to_pixel(self.cells[self.head_index])
+
+    def turn(self, point):
+        if self.length > 1 and (point[0] * -1, point[1] * -1) == self.direction:
+            return
+        else:
+            self.direction = point
+
+    def move(self):
+        width = self.grid_width
+        head = self.cells[self.head_index]
+        y, x = divmod(head, width)
+
+        # Wall wrap-around (Nokia style)
+        new = ((y + self.direction[1]) % self.grid_height) * width + (x + self.direction[0]) % width
+
+        if self.size > 2 and self.occupancy[new]:
+            # Hit self unless the only segments there are the head and neck
+            hits = self.occupancy[new]
+            if new == head:
+                hits -= 1
+            if new == self.cell_at(1):
+                hits -= 1
+            if hits > 0:
+                return False
+
+        self._push_head(new)
+        self.vacated_cell = None
+        if self.size > self.length:
+            self.vacated_cell = self._pop_tail()
+
+        return True
+
+    def _push_head(self, cell):
+        self.head_index = (self.head_index - 1) % self.capacity
+        self.cells[self.head_index] = cell
+        if not self.occupancy[cell]:
+            self.free_cells.remove(cell)
+        self.occupancy[cell] += 1
+        self.size += 1
+
+    def _pop_tail(self):
+        self.size -= 1
+        cell = self.cells[(self.head_index + self.size) % self.capacity]
+        self.occupancy[cell] -= 1
+        if not self.occupancy[cell]:
+            self.free_cells.add(cell)
+        return cell
+
+    def reset_position(self):
+        while self.size:
+            self._pop_tail()
+        self.length = 3
+        self._push_head(self.start_cell())
+        self.vacated_cell = None
+        self.direction = STOPPED # Stationary at start
+
+    def grow(self):
+        self.length += 1
+        self.score += FOOD_SCORE
+
+
+class FoodModel:
+    def __init__(self, rng=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.position = (0, 0)
+        self.cell = 0
+        self.rng = rng or random
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.randomize_position([])
+
+    def randomize_position(self, snake_positions):
+        """Place the food on a random free cell.
+
+        Returns False (and leaves position as None) when the board is full.
+        """
+        free = getattr(snake_positions, "free_cells", None)
+        if free is None:
+            # Plain list of pixel positions: build the free set once
+            free = FreeCells(self.grid_width * self.grid_height)
+            for x, y in snake_positions:
+                free.remove((y // GRID_SIZE) * self.grid_width + x // GRID_SIZE)
+
+        self.cell = free.choice(self.rng)
+        if self.cell is None:
+            self.position = None
+            return False
+        y, x = divmod(self.cell, self.grid_width)
+        self.position = (x * GRID_SIZE, y * GRID_SIZE)
+        return True
+
+
+class GameState:
+    """Everything needed to advance one game. Pass in Snake/Food to get drawable models."""
+
+    def __init__(self, snake=None, food=None, lives=START_LIVES):
+        self.snake = snake if snake is not None else SnakeModel()
+        self.food = food if food is not None else FoodModel()
+        self.lives = lives
+        self.score = 0
+        self.tick = 0
+        self.game_over = False
+        self.won = False
+
+
+def neighbour_table(grid_width, grid_height):
+    """neighbours[cell * 4 + code] is the cell reached by DIRECTIONS[code], wrapping like SnakeModel.move."""
+    neighbours = array('i', bytes(4 * 4 * grid_width * grid_height))
+    for cell in range(grid_width * grid_height):
+        y, x = divmod(cell, grid_width)
+        for code, (dx, dy) in enumerate(DIRECTIONS):
+            neighbours[cell * 4 + code] = ((y + dy) % grid_height) * grid_width + (x + dx) % grid_width
+    return neighbours
+
+
+def new_seed():
+    """Fresh 64-bit game seed."""
+    return random.SystemRandom().getrandbits(64)
+
+
+def new_game(seed, snake_class=None, food_class=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+    """GameState whose food placement is fully determined by seed.
+
+    snake_class/food_class default to the headless models; Game passes the
+    drawable Snake and Food.
+    """
+    snake_class = snake_class or SnakeModel
+    food_class = food_class or FoodModel
+    snake = snake_class(grid_width, grid_height)
+    food = food_class(random.Random(seed), grid_width, grid_height)
+    return GameState(snake, food)
+
+
+def step(state, action=None):
+    """Advance the game by one tick.
+
+    action is a direction tuple (UP, DOWN, LEFT, RIGHT) or None to keep going.
+    Returns (state, events); state is updated in place.
+    """
+    events = []
+    if state.game_over:
+        return state, events
+
+    snake = state.snake
+    if action is not None:
+        snake.turn(action)
+
+    if snake.direction != STOPPED:
+        alive = snake.move()
+        if not alive:
+            state.lives -= 1
+            events.append(EVENT_DIED)
+            if state.lives <= 0:
+                state.game_over = True
+                events.append(EVENT_GAME_OVER)
+                state.tick += 1
+                return state, events
+            else:
+                snake.reset_position()
+
+        if snake.head_cell == state.food.cell:
+            snake.grow()
+            state.score += FOOD_SCORE
+            events.append(EVENT_FOOD)
+            if not state.food.randomize_position(snake.positions):
+                # No free cell left: the snake fills the board
+                state.won = True
+                state.game_over = True
+                events.append(EVENT_WIN)
+                events.append(EVENT_GAME_OVER)
+
+    state.tick += 1
+    return state, events
@@ -0,0 +1,289 @@
+import random
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from src.constants import GRID_WIDTH, GRID_HEIGHT
+from src.engine import (new_game, step, START_LIVES, STOPPED, DIRECTIONS,
+                        EVENT_FOOD, EVENT_DIED, EVENT_GAME_OVER, EVENT_WIN)
+
+# Reinforcement-learning wrapper around src/engine.py with the
+# reset()/step() shape of Gym environments (it doesn't import gym).
+
+# Actions are direction codes, the same order as src/replay.py
+ACTIONS = DIRECTIONS
+# Direction feature: the action code, 4 before the snake starts moving
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS + (STOPPED,))}
+
+# Grid observation values
+EMPTY = 0
+BODY = 1
+HEAD = 2
+FOOD = 3
+
+# Scalar observation, in this order
+FEATURES = ("lives", "length", "direction", "head_x", "head_y", "food_x", "food_y", "idle_ticks")
+
+# Reward per event; pass a dict to SnakeEnv to change any of them
+REWARDS = {
+    "food": 1.0,
+    "death": -1.0, # Each life lost
+    "game_over": 0.0, # On top of death, for the last life
+    "win": 10.0,
+    "step": 0.0, # Every tick, e.g. a small negative to hurry the snake
+}
+
+
+class SnakeEnv:
+    """One game as an environment.
+
+    reset() returns (observation, info) and step(action) returns
+    (observation, reward, terminated, truncated, info). The observation is
+    a dict: "grid" is a (grid_height, grid_width) uint8 array of EMPTY,
+    BODY, HEAD and FOOD, and "features" a float32 array laid out as
+    FEATURES. action is an index into ACTIONS; reversing is ignored, as in
+    the game.
+
+    The episode terminates when the last life is lost or the board is full,
+    and is truncated after max_ticks ticks, or max_idle_ticks ticks without
+    food (None turns either off). The observation arrays are reused, so
+    copy them to keep one past the next step; grid and features can be
+    given to have them written straight into, say, shared memory.
+    """
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, rewards=None, lives=START_LIVES,
+                 max_ticks=None, max_idle_ticks=None, seed=None, grid=None, features=None):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        unknown = set(rewards or ()) - set(REWARDS)
+        if unknown:
+            raise ValueError(f"Unknown reward(s): {', '.join(sorted(unknown))}")
+        self.rewards = dict(REWARDS, **(rewards or {}))
+        self.lives = lives
+        self.max_ticks = max_ticks
+        self.max_idle_ticks = max_idle_ticks
+        self.rng = random.Random(seed)
+        self.grid = grid if grid is not None else np.zeros((grid_height, grid_width), dtype=np.uint8)
+        self.features = features if features is not None else np.zeros(len(FEATURES), dtype=np.float32)
+        self.state = None
+        self.occupancy = None
+        self.idle_ticks = 0
+
+    def reset(self, seed=None):
+        """Start a new game, seeded from seed or else from the env's own generator."""
+        if seed is not None:
+            self.rng.seed(seed)
+        game_seed = self.rng.getrandbits(64)
+        self.state = new_game(game_seed, grid_width=self.grid_width, grid_height=self.grid_height)
+        self.state.lives = self.lives
+        # The occupancy bytearray viewed in place, so observing is one copy
+        self.occupancy = np.frombuffer(self.state.snake.occupancy, dtype=np.uint8).reshape(self.grid_height, self.grid_width)
+        self.idle_ticks = 0
+        return self.observe(), {"seed": game_seed}
+
+    def step(self, action):
+        state = self.state
+        _, events = step(state, ACTIONS[action] if action is not None and action >= 0 else None)
+
+        reward = self.rewards["step"]
+        self.idle_ticks += 1
+        if EVENT_FOOD in events:
+            reward += self.rewards["food"]
+            self.idle_ticks = 0
+        if EVENT_DIED in events:
+            reward += self.rewards["death"]
+        if EVENT_GAME_OVER in events and not state.won:
+            reward += self.rewards["game_over"]
+        if EVENT_WIN in events:
+            reward += self.rewards["win"]
+
+        terminated = state.game_over
+        truncated = not terminated and (
+            (self.max_ticks is not None and state.tick >= self.max_ticks)
+            or (self.max_idle_ticks is not None and self.idle_ticks >= self.max_idle_ticks))
+        info = {"events": events, "score": state.score, "tick": state.tick}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe(self):
+        """Write the current state into grid and features; returns them as a dict."""
+        state = self.state
+        snake = state.snake
+        grid = self.grid
+        np.copyto(grid, self.occupancy)
+        head_y, head_x = divmod(snake.head_cell, self.grid_width)
+        grid[head_y, head_x] = HEAD
+        food_x = food_y = -1
+        if state.food.cell is not None:
+            food_y, food_x = divmod(state.food.cell, self.grid_width)
+            grid[food_y, food_x] = FOOD
+        self.features[:] = (state.lives, snake.length, DIRECTION_CODES[snake.direction],
+                            head_x, head_y, food_x, food_y, self.idle_ticks)
+        return {"grid": grid, "features": self.features}
+
+
+class SharedBuffers:
+    """Observation, action and result arrays for num_envs envs in one shared memory block."""
+
+    def __init__(self, num_envs, grid_width, grid_height, name=None):
+        fields = [
+            ("grid", (num_envs, grid_height, grid_width), np.uint8),
+            ("features", (num_envs, len(FEATURES)), np.float32),
+            ("rewards", (num_envs,), np.float32),
+            ("terminated", (num_envs,), np.bool_),
+            ("truncated", (num_envs,), np.bool_),
+            ("actions", (num_envs,), np.int8),
+        ]
+        # Each array starts on a 64-byte boundary
+        layout = []
+        size = 0
+        for field, shape, dtype in fields:
+            layout.append((field, shape, dtype, size))
+            size += -(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 64) * 64
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        for field, shape, dtype, offset in layout:
+            setattr(self, field, np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset))
+
+    def close(self, unlink=False):
+        # Views into the block must go before it can be closed
+        for field in ("grid", "features", "rewards", "terminated", "truncated", "actions"):
+            setattr(self, field, None)
+        try:
+            self.shm.close()
+        except BufferError:
+            pass # Arrays handed out earlier are still alive; the mapping goes with them
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(conn, name, num_envs, start, stop, env_kwargs, seed):
+    """Runs envs start..stop-1, reading actions and writing results in shared memory.
+
+    Only short commands and finished-episode summaries go through the pipe.
+    """
+    buffers = SharedBuffers(num_envs, env_kwargs.get("grid_width", GRID_WIDTH),
+                            env_kwargs.get("grid_height", GRID_HEIGHT), name)
+    envs = [SnakeEnv(grid=buffers.grid[i], features=buffers.features[i],
+                     seed=None if seed is None else seed + i, **env_kwargs) for i in range(start, stop)]
+    returns = [0.0] * len(envs)
+    try:
+        while True:
+            command = conn.recv()
+            if command == "step":
+                finished = []
+                rewards = buffers.rewards[start:stop]
+                terminated_out = buffers.terminated[start:stop]
+                truncated_out = buffers.truncated[start:stop]
+                for i, action in enumerate(buffers.actions[start:stop].tolist()):
+                    env = envs[i]
+                    _, reward, terminated, truncated, info = env.step(action)
+                    returns[i] += reward
+                    rewards[i] = reward
+                    terminated_out[i] = terminated
+                    truncated_out[i] = truncated
+                    if terminated or truncated:
+                        finished.append((start + i, returns[i], info["score"], info["tick"]))
+                        returns[i] = 0.0
+                        env.reset() # The next observation starts the next episode
+                conn.send(finished)
+            elif command == "reset":
+                for i, env in enumerate(envs):
+                    env.reset()
+                    returns[i] = 0.0
+                conn.send(None)
+            elif command == "close":
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        envs.clear()
+        buffers.close()
+        conn.close()
+
+
+class VectorEnv:
+    """num_envs SnakeEnvs stepped together in worker processes.
+
+    Envs are split into contiguous blocks, one per worker (default: one per
+    core). Actions, observations, rewards and done flags live in one
+    shared memory block, so a step sends each worker just a command.
+
+    step(actions) returns (observations, rewards, terminated, truncated,
+    infos) as arrays over envs. An env that finishes is reset right away:
+    its observation is the first of its next episode, and infos["episodes"]
+    lists (env index, return, score, ticks) for each finished episode.
+    The returned arrays are views of the shared block, overwritten by the
+    next step.
+    """
+
+    def __init__(self, num_envs, num_workers=None, seed=None, context=None, **env_kwargs):
+        self.num_envs = num_envs
+        self.num_workers = max(1, min(num_workers or mp.cpu_count(), num_envs))
+        grid_width = env_kwargs.get("grid_width", GRID_WIDTH)
+        grid_height = env_kwargs.get("grid_height", GRID_HEIGHT)
+        self.buffers = SharedBuffers(num_envs, grid_width, grid_height)
+        self.closed = False
+
+        ctx = mp.get_context(context)
+        self.conns = []
+        self.processes = []
+        bounds = [num_envs * w // self.num_workers for w in range(self.num_workers + 1)]
+        for w in range(self.num_workers):
+            parent, child = ctx.Pipe()
+            process = ctx.Process(target=_worker, name=f"snake-env-{w}", daemon=True,
+                                  args=(child, self.buffers.name, num_envs, bounds[w], bounds[w + 1], env_kwargs, seed))
+            process.start()
+            child.close()
+            self.conns.append(parent)
+            self.processes.append(process)
+
+    def observations(self):
+        return {"grid": self.buffers.grid, "features": self.buffers.features}
+
+    def reset(self):
+        for conn in self.conns:
+            conn.send("reset")
+        for conn in self.conns:
+            conn.recv()
+        return self.observations(), {}
+
+    def step(self, actions):
+        self.buffers.actions[:] = actions
+        for conn in self.conns:
+            conn.send("step")
+        episodes = []
+        for conn in self.conns:
+            episodes.extend(conn.recv())
+        buffers = self.buffers
+        return self.observations(), buffers.rewards, buffers.terminated, buffers.truncated, {"episodes": episodes}
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self.conns:
+            try:
+                conn.send("close")
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.conns:
+            conn.close()
+        self.buffers.close(unlink=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,98 @@
+import time
+import pygame
+from collections import OrderedDict
+from src import profiler
+from src.profiler import frame_profiler
+
+FONT_NAME = "arial"
+
+# Rendered text surfaces are kept up to this many bytes of pixel data
+TEXT_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+_font_paths = {} # bold -> file path (None means pygame's default font)
+_fonts = {} # (size, bold) -> Font
+_text_cache = OrderedDict() # (text, font, color, antialias) -> Surface
+_text_cache_bytes = 0
+_atlases = {} # (font, color) -> DigitAtlas
+
+def init():
+    """Resolve the font files once. Safe to call more than once."""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    for bold in (False, True):
+        if bold not in _font_paths:
+            _font_paths[bold] = pygame.font.match_font(FONT_NAME, bold=bold)
+
+def get_font(size, bold=False):
+    """Shared Font for the given size, created on first use."""
+    key = (size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        init()
+        path = _font_paths[bold]
+        font = pygame.font.Font(path, size)
+        if bold and (path is None or path == _font_paths[False]):
+            # No separate bold face installed, let SDL_ttf embolden it
+            font.set_bold(True)
+        _fonts[key] = font
+    return font
+
+def render_text(text, font, color, antialias=True):
+    """font.render() through a bounded LRU cache of surfaces."""
+    global _text_cache_bytes
+    key = (text, font, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    started = time.perf_counter()
+    surface = font.render(text, antialias, color)
+    frame_profiler.add(profiler.TEXT, time.perf_counter() - started)
+    _text_cache[key] = surface
+    _text_cache_bytes += _surface_bytes(surface)
+    while _text_cache_bytes > TEXT_CACHE_MAX_BYTES and len(_text_cache) > 1:
+        _, old = _text_cache.popitem(last=False)
+        _text_cache_bytes -= _surface_bytes(old)
+    return surface
+
+def clear_text_cache():
+    global _text_cache_bytes
+    _text_cache.clear()
+    _text_cache_bytes = 0
+
+def _surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def digit_atlas(font, color):
+    key = (font, tuple(color))
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = DigitAtlas(font, color)
+        _atlases[key] = atlas
+    return atlas
+
+
+class DigitAtlas:
+    """The glyphs 0-9 rendered once, so changing counters never call render().
+
+    Only meant for non-negative integers such as the score and lives.
+    """
+
+    def __init__(self, font, color):
+        self.glyphs = [render_text(str(d), font, color) for d in range(10)]
+        self.widths = [g.get_width() for g in self.glyphs]
+        self.height = max(g.get_height() for g in self.glyphs)
+
+    def size(self, value):
+        return (sum(self.widths[int(c)] for c in str(value)), self.height)
+
+    def draw(self, surface, value, topleft):
+        x, y = topleft
+        blits = []
+        for c in str(value):
+            d = int(c)
+            blits.append((self.glyphs[d], (x, y)))
+            x += self.widths[d]
+        surface.blits(blits, doreturn=False)
@@ -1,22 +1,13 @@
-import pygame
-import random
 from src.constants import *
+from src.engine import FoodModel
+from src.sprites import food_sprite
 
-class Food:
-    def __init__(self):
-        self.position = (0, 0)
+class Food(FoodModel):
+    def __init__(self, rng=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
         self.color = RED
-        self.randomize_position([])
-
-    def randomize_position(self, snake_positions):
-        while True:
-            x = random.randint(0, GRID_WIDTH - 1) * GRID_SIZE
-            y = random.randint(0, GRID_HEIGHT - 1) * GRID_SIZE
-            self.position = (x, y)
-            if self.position not in snake_positions:
-                break
+        super().__init__(rng, grid_width, grid_height)
 
     def draw(self, surface):
-        r = pygame.Rect((self.position[0], self.position[1]), (GRID_SIZE, GRID_SIZE))
-        pygame.draw.rect(surface, self.color, r)
-        pygame.draw.rect(surface, WHITE, r, 1)
+        if self.position is None:
+            return
+        surface.blit(food_sprite(GRID_SIZE, self.color), self.position)
@@ -1,31 +1,131 @@
 import pygame
 import logging
+from collections import deque
 from src.constants import *
+from src.engine import new_game, new_seed, step, UP, DOWN, LEFT, RIGHT, EVENT_DIED, EVENT_GAME_OVER
+from src.autopilot import Autopilot
 from src.snake import Snake
 from src.food import Food
+from src.renderer import DirtyRectRenderer
+from src.replay import ReplayRecorder, new_replay_path
+from src.scheduler import FrameScheduler, IDLE_TIMEOUT_MS
+from src import profiler
+from src.profiler import frame_profiler
+from src.fonts import get_font
 from src.utils import draw_text
 
+KEY_DIRECTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+}
+
+def display_refresh_rate():
+    """Refresh rate of the main display, or RENDER_FPS if SDL doesn't know it."""
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        return RENDER_FPS
+    return rates[0] if rates and rates[0] > 0 else RENDER_FPS
+
 class Game:
-    def __init__(self, screen, fps=15, difficulty="Medium"):
+    """One round of play.
+
+    The simulation advances in fixed steps of 1/fps seconds (fps comes from
+    DIFFICULTY) while frames are drawn at the display's refresh rate, with
+    the snake interpolated between steps. Turns pressed between two steps
+    are queued and applied one per step.
+
+    Each game has its own seed and records its inputs as a replay
+    (src/replay.py), saved under the user data folder unless record is False.
+    With autopilot, src/autopilot.py steers instead of the arrow keys.
+    """
+
+    def __init__(self, screen, fps=15, difficulty="Medium", scheduler=None, seed=None, record=True, autopilot=False):
         self.screen = screen
+        self.scheduler = scheduler or FrameScheduler()
         self.fps = fps
+        self.render_fps = display_refresh_rate()
         self.difficulty = difficulty
-        self.snake = Snake()
-        self.food = Food()
-        self.lives = 3
-        self.score = 0
+        self.seed = new_seed() if seed is None else seed
+        self.state = new_game(self.seed, Snake, Food)
+        self.replay_path = None
+        if record:
+            try:
+                self.replay_path = new_replay_path(difficulty, self.seed)
+            except OSError as e:
+                logging.error(f"Replays disabled, no data folder: {e}")
+        self.recorder = ReplayRecorder(self.seed, difficulty, self.snake.grid_width, self.snake.grid_height, self.replay_path)
+        self.autopilot = Autopilot(self.snake.grid_width, self.snake.grid_height) if autopilot else None
         self.paused = False
-        self.font_hud = pygame.font.SysFont("arial", FONT_SIZE_HUD)
-        self.font_title = pygame.font.SysFont("arial", FONT_SIZE_TITLE, bold=True)
+        self.turns = deque()
+        self.font_hud = get_font(FONT_SIZE_HUD)
+        self.font_title = get_font(FONT_SIZE_TITLE, bold=True)
+        self.renderer = DirtyRectRenderer(screen, self.font_hud)
+
+    # The rules live in src/engine.py; these just expose the current state.
+    @property
+    def snake(self):
+        return self.state.snake
+
+    @property
+    def food(self):
+        return self.state.food
+
+    @property
+    def lives(self):
+        return self.state.lives
+
+    @property
+    def score(self):
+        return self.state.score
+
+    def replay(self):
+        """The finished game's encoded replay, uploaded with its score."""
+        return bytes(self.recorder.data) if self.recorder.finished else None
+
+    def queue_turn(self, direction):
+        """Buffer a turn for a later step, dropping ones that can't apply."""
+        last = self.turns[-1] if self.turns else self.snake.direction
+        if direction == last or len(self.turns) >= INPUT_BUFFER:
+            return
+        # Reversing onto the neck; the engine would ignore it at step time
+        if self.snake.length > 1 and (-direction[0], -direction[1]) == last:
+            return
+        self.turns.append(direction)
+
+    def update(self):
+        """Advance the simulation by one fixed step. Returns the engine events."""
+        if self.autopilot is not None:
+            action = self.autopilot.choose(self.state)
+        else:
+            action = self.turns.popleft() if self.turns else None
+        if action is not None:
+            self.recorder.record(self.state.tick, action)
+        _, events = step(self.state, action)
+        if EVENT_DIED in events:
+            self.turns.clear()
+        return events
 
     def run(self):
+        try:
+            return self.loop()
+        finally:
+            # Footer with the final score; the writer thread finishes the file
+            self.recorder.finish(self.state)
+
+    def loop(self):
         logging.info("Game.run() started")
-        clock = pygame.time.Clock()
+        scheduler = self.scheduler
+        step_ms = 1000.0 / self.fps
+        lag = 0.0 # Time not yet simulated, in ms
+        elapsed = 0
         running = True
-        
+
         while running:
-            # Event Handling
-            for event in pygame.event.get():
+            # Event Handling; while paused nothing moves, so sleep until a key
+            for event in scheduler.events(IDLE_TIMEOUT_MS if self.paused else None):
                 if event.type == pygame.QUIT:
                     logging.info("Game: QUIT event received")
                     return "quit_app"
@@ -35,54 +135,53 @@ class Game:
                         return "menu"
                     elif event.key == pygame.K_p or event.key == pygame.K_TAB:
                         self.paused = not self.paused
-                    elif not self.paused:
-                        if event.key == pygame.K_UP:
-                            self.snake.turn((0, -1))
-                        elif event.key == pygame.K_DOWN:
-                            self.snake.turn((0, 1))
-                        elif event.key == pygame.K_LEFT:
-                            self.snake.turn((-1, 0))
-                        elif event.key == pygame.K_RIGHT:
-                            self.snake.turn((1, 0))
+                        self.renderer.invalidate()
+                        scheduler.invalidate()
+                    elif not self.paused and self.autopilot is None and event.key in KEY_DIRECTIONS:
+                        self.queue_turn(KEY_DIRECTIONS[event.key])
+                elif event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.renderer.invalidate()
 
             if self.paused:
-                self.draw_pause()
-                pygame.display.flip()
-                clock.tick(self.fps)
+                # Drawn once, and again only if the window needs repainting
+                if scheduler.needs_redraw("paused"):
+                    self.renderer.invalidate()
+                    self.draw(lag / step_ms)
+                    self.draw_pause()
+                    scheduler.mark_dirty()
+                frame_profiler.mark(profiler.DRAW)
+                scheduler.present()
+                scheduler.tick(self.render_fps)
+                elapsed = 0 # Don't catch up on the time spent paused
                 continue
 
-            # Game Logic
-            if self.snake.direction != (0, 0):
-                alive = self.snake.move()
-                if not alive:
-                    self.lives -= 1
-                    if self.lives <= 0:
-                        return "game_over"
-                    else:
-                        self.snake.reset_position()
-
-                if self.snake.get_head_position() == self.food.position:
-                    self.snake.grow()
-                    self.score += 10
-                    self.food.randomize_position(self.snake.positions)
+            # Game Logic: as many fixed steps as real time allows
+            lag = min(lag + elapsed, step_ms * MAX_CATCH_UP_STEPS)
+            while lag >= step_ms:
+                lag -= step_ms
+                events = self.update()
+                if EVENT_GAME_OVER in events:
+                    return "game_over"
+                self.renderer.note_step(self.snake, events)
+            frame_profiler.mark(profiler.UPDATE)
 
             # Drawing
-            self.draw()
-            pygame.display.flip()
-            clock.tick(self.fps)
+            scheduler.mark_dirty(self.draw(lag / step_ms))
+            frame_profiler.mark(profiler.DRAW)
+            scheduler.present()
+            elapsed = scheduler.tick(self.render_fps)
 
         return "menu"
 
-    def draw(self):
-        self.screen.fill(BG_COLOR)
-        self.snake.draw(self.screen)
-        self.food.draw(self.screen)
-        
+    def draw(self, alpha=1.0):
+        """Draw the changed parts of the frame, alpha of the way into the next step.
+
+        Returns the rects to pass to pygame.display.update(), or None if the
+        whole screen was redrawn and should be flipped.
+        """
         # HUD
-        score_text = f"Score: {self.score}"
-        lives_text = f"Lives: {self.lives}"
-        draw_text(self.screen, score_text, self.font_hud, WHITE, (70, 20))
-        draw_text(self.screen, lives_text, self.font_hud, WHITE, (SCREEN_WIDTH - 70, 20))
+        hud = [("Score: ", self.score, (70, 20)), ("Lives: ", self.lives, (SCREEN_WIDTH - 70, 20))]
+        return self.renderer.draw(self.snake, self.food, hud, alpha)
 
     def draw_pause(self):
         draw_text(self.screen, "PAUSED", self.font_title, YELLOW, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
@@ -1,37 +1,192 @@
+import time
+import sqlite3
+import logging
 import threading
 from src.database import Database
+from src.local_store import LocalStore
+from src.sync import SyncEngine
+
+# The remote top scores are pulled again once they are older than this
+# many seconds and someone looks at the leaderboard.
+CACHE_TTL = 30
+TOP_LIMIT = 10
+PAGE_SIZE = 10
+# Wait this long before retrying a page or rank lookup that failed
+FETCH_RETRY = 5
 
 class Leaderboard:
     def __init__(self):
         self.db = Database()
         self.use_db = False
         self.is_loading = True
-        
-        self.thread = threading.Thread(target=self._init_db_connection)
-        self.thread.daemon = True
-        self.thread.start()
-
-    def _init_db_connection(self):
-        self.db.connect()
-        self.use_db = self.db.connected
+
+        # Scores are written locally first and synced in the background
+        self.store = self._open_store()
+        self.lock = threading.Lock()
+        self.remote_top = self.store.remote_top()
+        self.top_scores = self._merge_top()
+        self.fetched_at = 0.0
+        self.version = 0 # Bumped whenever top_scores, a page or a rank changes
+
+        # Per-difficulty pages and rank lookups, fetched on demand in the background
+        self.pages = {} # (difficulty, page) -> (rows, has_more, fetched_at)
+        self.cursors = {} # (difficulty, page) -> keyset cursor of that page's last row
+        self.ranks = {} # (username, difficulty) -> ((score, rank, total) or (), fetched_at)
+        self.in_flight = set()
+        self.attempted = {}
+
+        self.sync = SyncEngine(self.store, self.db, on_status=self._on_status, on_pull=self._on_pull)
+        self.sync.start()
+
+    def _open_store(self):
+        try:
+            return LocalStore()
+        except (sqlite3.Error, OSError) as e:
+            logging.error(f"Could not open local score store, keeping scores in memory: {e}")
+            return LocalStore(":memory:")
+
+    def _on_status(self, connected):
+        if not connected and (self.use_db or self.is_loading):
+            logging.warning("Offline: scores are saved locally and will sync once the connection returns")
+        self.use_db = connected
         self.is_loading = False
 
-    def add_score(self, name, score, difficulty="Medium"):
-        if self.use_db:
-            threading.Thread(target=self._add_db_score, args=(name, score, difficulty), daemon=True).start()
+    def _on_pull(self, scores):
+        self.fetched_at = time.monotonic()
+        with self.lock:
+            self.remote_top = scores
+            self._update_top()
+            # New uploads may have moved things around; refresh on next view
+            for key, (rows, has_more, _) in self.pages.items():
+                self.pages[key] = (rows, has_more, 0.0)
+            for key, (rank, _) in self.ranks.items():
+                self.ranks[key] = (rank, 0.0)
+
+    def _update_top(self):
+        top = self._merge_top()
+        if top != self.top_scores:
+            self.top_scores = top
+            self.version += 1
+
+    def _merge_top(self, only_difficulty=None):
+        # Remote top-N plus local scores that may not have reached the server yet
+        best = {}
+        for username, score, difficulty in list(self.remote_top) + self.store.local_scores():
+            if only_difficulty is not None and difficulty != only_difficulty:
+                continue
+            key = (username, difficulty)
+            if key not in best or score > best[key]:
+                best[key] = score
+        rows = [(username, score, difficulty) for (username, difficulty), score in best.items()]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:TOP_LIMIT]
 
-    def _add_db_score(self, name, score, difficulty):
-        success = self.db.add_score(name, score, difficulty)
-        if not success:
-            print("Failed to save to DB.")
+    def add_score(self, name, score, difficulty="Medium", replay=None):
+        # Local write only; the sync engine uploads it (and its replay) when it can
+        self.store.add_score(name, score, difficulty, replay)
+        with self.lock:
+            self._update_top()
+        self.sync.notify()
 
     def get_top_scores(self):
-        if self.is_loading:
-            return []
-        
-        if self.use_db:
-            return self.db.get_top_scores()
-        return []
+        """Return the cached top scores without blocking.
+
+        Asks the sync engine for a fresh pull when the cache is older than CACHE_TTL.
+        """
+        if self.use_db and time.monotonic() - self.fetched_at > CACHE_TTL:
+            self.fetched_at = time.monotonic()
+            self.sync.request_pull()
+        return self.top_scores
+
+    def get_page(self, difficulty, page):
+        """One page of a difficulty's leaderboard without blocking.
+
+        Returns (rows, has_more) with rows as (rank, username, score, difficulty),
+        or (None, False) while the page is still being fetched. difficulty None
+        is the mixed top list. Offline, only a first page built from local data
+        is available.
+        """
+        if difficulty is None:
+            rows = self.get_top_scores() if page == 0 else []
+            return [(i + 1,) + tuple(row) for i, row in enumerate(rows)], False
+        if not self.is_online():
+            if page > 0:
+                return [], False
+            rows = self._merge_top(difficulty)
+            return [(i + 1,) + tuple(row) for i, row in enumerate(rows)], False
+
+        key = (difficulty, page)
+        cached = self.pages.get(key)
+        if cached is None or time.monotonic() - cached[2] > CACHE_TTL:
+            if page == 0 or (difficulty, page - 1) in self.cursors:
+                self._fetch_async(key, self._fetch_page, difficulty, page)
+        if cached is None:
+            return None, False
+        return cached[0], cached[1]
+
+    def get_rank(self, username, difficulty):
+        """(score, rank, total) for the player, () if unranked, None if not known yet."""
+        if not self.is_online() or not username:
+            return None
+        key = (username, difficulty)
+        cached = self.ranks.get(key)
+        if cached is None or time.monotonic() - cached[1] > CACHE_TTL:
+            self._fetch_async(("rank",) + key, self._fetch_rank, username, difficulty)
+        return cached[0] if cached is not None else None
+
+    def _fetch_async(self, key, fetch, *args):
+        now = time.monotonic()
+        with self.lock:
+            if key in self.in_flight or now - self.attempted.get(key, -FETCH_RETRY) < FETCH_RETRY:
+                return
+            self.in_flight.add(key)
+            self.attempted[key] = now
+
+        def worker():
+            try:
+                fetch(*args)
+            finally:
+                with self.lock:
+                    self.in_flight.discard(key)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _fetch_page(self, difficulty, page):
+        after = None if page == 0 else self.cursors.get((difficulty, page - 1))
+        # One extra row tells whether another page follows
+        rows = self.db.get_scores_page(difficulty, after, PAGE_SIZE + 1)
+        if rows is None:
+            return
+        has_more = len(rows) > PAGE_SIZE
+        rows = rows[:PAGE_SIZE]
+        display = []
+        for i, (row_id, username, score, row_difficulty, created_at) in enumerate(rows):
+            display.append((page * PAGE_SIZE + i + 1, username, score, row_difficulty))
+        with self.lock:
+            if rows:
+                row_id, _, score, _, created_at = rows[-1]
+                self.cursors[(difficulty, page)] = (score, created_at, row_id)
+            self.pages[(difficulty, page)] = (display, has_more, time.monotonic())
+            self.version += 1
+
+    def _fetch_rank(self, username, difficulty):
+        rank = self.db.get_player_rank(username, difficulty)
+        if rank is None:
+            return
+        with self.lock:
+            self.ranks[(username, difficulty)] = (rank, time.monotonic())
+            self.version += 1
+
+    def close(self, timeout=5.0):
+        """Upload pending scores (up to timeout seconds) and close connections."""
+        self.sync.close(timeout)
+        self.db.close()
+        if not self.sync.thread.is_alive():
+            self.store.close()
 
     def is_online(self):
         return self.use_db and not self.is_loading
+
+    def can_play(self):
+        """Scores can be kept somewhere: on the server or in the local store."""
+        return self.is_online() or self.store.persistent
@@ -0,0 +1,119 @@
+import time
+import uuid
+import sqlite3
+import threading
+from src.paths import user_data_path
+
+STORE_FILE = "scores.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS local_scores (
+    username TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    upload_key TEXT NOT NULL,
+    synced INTEGER NOT NULL DEFAULT 0,
+    replay BLOB,
+    PRIMARY KEY (username, difficulty)
+);
+CREATE INDEX IF NOT EXISTS idx_local_unsynced ON local_scores (synced) WHERE synced = 0;
+CREATE TABLE IF NOT EXISTS remote_top (
+    position INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    difficulty TEXT NOT NULL
+);
+"""
+
+class LocalStore:
+    """Scores kept on this machine in SQLite (WAL mode).
+
+    Every score lands here first, so saving works offline and takes
+    microseconds. Each row is the player's best for one difficulty plus an
+    upload key that changes whenever the score improves; SyncEngine uploads
+    rows with synced = 0 and marks them by key, together with the replay
+    of that best game. remote_top holds the last top-N pulled from the server.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or user_data_path(STORE_FILE)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: commits don't fsync, the log is synced at checkpoints
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(local_scores)")]
+        if "replay" not in columns:
+            # Store created before replays were recorded
+            self.conn.execute("ALTER TABLE local_scores ADD COLUMN replay BLOB")
+
+    @property
+    def persistent(self):
+        return self.path != ":memory:"
+
+    def add_score(self, username, score, difficulty, replay=None):
+        """Record a score, keeping only the best per (username, difficulty)."""
+        with self.lock:
+            self.conn.execute(
+                """
+                INSERT INTO local_scores (username, difficulty, score, created_at, upload_key, synced, replay)
+                VALUES (?, ?, ?, ?, ?, 0, ?)
+                ON CONFLICT (username, difficulty) DO UPDATE
+                SET score = excluded.score,
+                    created_at = excluded.created_at,
+                    upload_key = excluded.upload_key,
+                    synced = 0,
+                    replay = excluded.replay
+                WHERE excluded.score > local_scores.score
+                """,
+                (username, difficulty, score, time.time(), uuid.uuid4().hex, replay),
+            )
+
+    def unsynced(self, limit=100):
+        """Rows waiting for upload as (username, score, difficulty, upload_key, replay)."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT username, score, difficulty, upload_key, replay FROM local_scores WHERE synced = 0 LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def mark_synced(self, upload_keys):
+        # Matching on the key leaves rows that improved during the upload unsynced
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE local_scores SET synced = 1 WHERE upload_key = ?",
+                [(key,) for key in upload_keys],
+            )
+
+    def local_scores(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT username, score, difficulty FROM local_scores ORDER BY score DESC"
+            ).fetchall()
+
+    def remote_top(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT username, score, difficulty FROM remote_top ORDER BY position"
+            ).fetchall()
+
+    def save_remote_top(self, rows):
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute("DELETE FROM remote_top")
+                self.conn.executemany(
+                    "INSERT INTO remote_top (position, username, score, difficulty) VALUES (?, ?, ?, ?)",
+                    [(i, username, score, difficulty) for i, (username, score, difficulty) in enumerate(rows)],
+                )
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,188 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Logging for the app. Threads that log (the game loop above all) only
+# put records on a queue; a listener thread formats them and does the
+# file and console I/O.
+
+LOG_FILE = "maze_runner.log"
+MAX_BYTES = 1024 * 1024 # Per file before rotating
+BACKUP_COUNT = 3 # Rotated files kept: maze_runner.log.1 .. .3
+QUEUE_SIZE = 10000 # Records waiting for the listener; more are dropped
+
+# Settings when not given on the command line
+LEVEL_ENV = "MAZE_RUNNER_LOG_LEVEL"
+JSON_ENV = "MAZE_RUNNER_LOG_JSON"
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener = None
+_handler = None
+_atexit_registered = False
+_levels = {} # Levels given at setup, restored by toggle_debug()
+_debug = False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never waits and leaves formatting to the listener.
+
+    The stock prepare() formats the whole record, traceback included, in
+    the calling thread; this one only merges the message arguments (they
+    may change once the call returns). A full queue drops the record
+    rather than stall the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, thread, message and exception."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def parse_levels(spec):
+    """"INFO" or "WARNING,src.sync=DEBUG" -> {logger name ("" for root): level}.
+
+    Raises ValueError for an unknown level name.
+    """
+    levels = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, level = part.rpartition("=")
+        value = logging.getLevelName(level.strip().upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level {level!r}")
+        levels[name.strip()] = value
+    return levels
+
+
+def apply_levels(levels):
+    """Set the levels from parse_levels()."""
+    for name, level in levels.items():
+        logging.getLogger(name or None).setLevel(level)
+
+
+def toggle_debug():
+    """Switch between DEBUG for every logger and the levels given at setup (F5 in the game).
+
+    Returns True if logging is now at DEBUG.
+    """
+    global _debug
+    _debug = not _debug
+    if _debug:
+        apply_levels({name: logging.DEBUG for name in {"", *_levels}})
+    else:
+        apply_levels({"": logging.INFO, **_levels})
+    return _debug
+
+
+def setup_logging(level=None, json_lines=None, path=None, console=None):
+    """Send logging through a queue to a rotating log file (and stderr).
+
+    level is a spec for parse_levels() and json_lines picks the JSON-lines
+    format; both default to the MAZE_RUNNER_LOG_LEVEL and
+    MAZE_RUNNER_LOG_JSON environment variables, then to INFO and text.
+    The file goes to the data folder unless path is given. console adds
+    INFO and above on stderr (default: whenever there is a stderr; the
+    windowed app has none). Returns the log file path.
+    """
+    global _listener, _handler, _atexit_registered, _levels, _debug
+    if _listener is not None:
+        shutdown_logging()
+
+    if level is None:
+        level = os.getenv(LEVEL_ENV) or "INFO"
+    if json_lines is None:
+        json_lines = os.getenv(JSON_ENV, "").lower() in ("1", "true", "yes")
+    if console is None:
+        console = sys.stderr is not None
+
+    handlers = []
+    formatter = JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT)
+    try:
+        if path is None:
+            from src.paths import user_data_path
+            path = user_data_path(LOG_FILE)
+        file_handler = RotatingFileHandler(path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                           encoding="utf-8", delay=True)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except OSError as e:
+        path = None
+        if sys.stderr is not None:
+            sys.stderr.write(f"Logging to the console only, no log file: {e}\n")
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+        handlers.append(console_handler)
+
+    log_queue = queue.Queue(QUEUE_SIZE)
+    _handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(logging.INFO)
+    _debug = False
+    try:
+        _levels = parse_levels(level)
+    except ValueError as e:
+        _levels = {}
+        logging.warning(f"{e}; logging at INFO")
+    apply_levels(_levels)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+    return path
+
+
+def shutdown_logging():
+    """Write out everything still queued and stop the listener thread."""
+    global _listener, _handler
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    if _handler is not None and _handler.dropped:
+        logging.warning(f"{_handler.dropped} log record(s) dropped, the queue was full")
+    listener.stop() # Drains the queue first
+    for handler in listener.handlers:
+        handler.close()
+    logging.getLogger().removeHandler(_handler)
+    _handler = None
@@ -3,26 +3,59 @@ import time
 import logging
 from src.constants import *
 from src.game import Game
-from src.leaderboard import Leaderboard
+from src.scheduler import FrameScheduler, IDLE_TIMEOUT_MS, POLL_TIMEOUT_MS
+from src.fonts import get_font, render_text
 from src.utils import draw_text
 
 class MainMenu:
-    def __init__(self, screen):
+    def __init__(self, screen, scheduler=None):
         self.screen = screen
-        self.font_title = pygame.font.SysFont("arial", FONT_SIZE_TITLE, bold=True)
-        self.font_menu = pygame.font.SysFont("arial", FONT_SIZE_MENU)
-        self.font_hud = pygame.font.SysFont("arial", FONT_SIZE_HUD)
-        self.font_small = pygame.font.SysFont("arial", FONT_SIZE_SMALL)
-        self.options = ["New Game", "Difficulty: Medium", "Leaderboard", "Help", "Quit"]
+        self.scheduler = scheduler or FrameScheduler()
+        self.font_title = get_font(FONT_SIZE_TITLE, bold=True)
+        self.font_menu = get_font(FONT_SIZE_MENU)
+        self.font_hud = get_font(FONT_SIZE_HUD)
+        self.font_small = get_font(FONT_SIZE_SMALL)
+        self.options = ["New Game", "Autopilot", "Difficulty: Medium", "Leaderboard", "Help", "Quit"]
         self.selected_index = 0
         self.game = None
-        self.leaderboard = Leaderboard()
+        self.leaderboard = None # Created once the splash is on screen
+        self.splash_shown = False
         self.state = "connecting"
+        self.shown_state = None
         self.username = ""
         self.difficulty_levels = ["Easy", "Medium", "Hard"]
         self.current_difficulty_index = 1
+        self.layers = {} # screen name -> (key, pre-rendered static surface)
+        self.leaderboard_tabs = [("All", None)] + [(d, d) for d in self.difficulty_levels]
+        self.leaderboard_tab = 0
+        self.leaderboard_page = 0
+        self.leaderboard_has_more = False
+
+    def static_layer(self, name, key, build):
+        """Cached static content of a screen, rebuilt only when key changes."""
+        cached = self.layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        layer = pygame.Surface(self.screen.get_size()).convert(self.screen)
+        layer.fill(BG_COLOR)
+        build(layer)
+        self.layers[name] = (key, layer)
+        return layer
+
+    def draw_title(self, surface, center):
+        # Title with shadow
+        title_surf = render_text("Maze Runner", self.font_title, GREEN)
+        shadow_surf = render_text("Maze Runner", self.font_title, (0, 0, 0))
+        title_rect = title_surf.get_rect(center=center)
+        surface.blit(shadow_surf, (title_rect.x + 4, title_rect.y + 4))
+        surface.blit(title_surf, title_rect)
 
     def run(self):
+        if self.state != self.shown_state:
+            # New screen, or back from a game that drew over everything
+            self.scheduler.invalidate()
+            self.shown_state = self.state
+
         if self.state == "connecting":
             return self.handle_connecting()
         elif self.state == "connection_error":
@@ -40,137 +73,162 @@ class MainMenu:
         return "continue"
 
     def handle_connecting(self):
-        self.screen.fill(BG_COLOR)
-        
-        # Simple Splash Screen
-        title_surf = self.font_title.render("Maze Runner", True, GREEN)
-        shadow_surf = self.font_title.render("Maze Runner", True, (0, 0, 0))
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        self.screen.blit(shadow_surf, (title_rect.x + 4, title_rect.y + 4))
-        self.screen.blit(title_surf, title_rect)
-        
-        pygame.display.flip()
-
-        if not self.leaderboard.is_loading:
-            if self.leaderboard.is_online():
-                self.state = "login"
-            else:
-                self.state = "connection_error"
-        
-        # Check for quit events even during loading
-        for event in pygame.event.get():
+        # Check for quit events even during loading; no waiting before the
+        # leaderboard exists, it is created on the next frame
+        timeout = POLL_TIMEOUT_MS if self.leaderboard is not None else None
+        for event in self.scheduler.events(timeout):
             if event.type == pygame.QUIT:
                 return "quit"
-        
+
+        if self.scheduler.needs_redraw("connecting"):
+            self.screen.fill(BG_COLOR)
+
+            # Simple Splash Screen
+            title_surf = render_text("Maze Runner", self.font_title, GREEN)
+            shadow_surf = render_text("Maze Runner", self.font_title, (0, 0, 0))
+            title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+            self.screen.blit(shadow_surf, (title_rect.x + 4, title_rect.y + 4))
+            self.screen.blit(title_surf, title_rect)
+            self.scheduler.mark_dirty()
+
+        if self.leaderboard is None:
+            if not self.splash_shown:
+                # Let the splash reach the screen before psycopg2 and friends load
+                self.splash_shown = True
+                return "continue"
+            from src.leaderboard import Leaderboard
+            self.leaderboard = Leaderboard()
+
+        # Scores go to the local store first, so play doesn't wait for the server
+        if self.leaderboard.can_play():
+            self.state = "login"
+        elif not self.leaderboard.is_loading:
+            self.state = "connection_error"
+
         return "continue"
 
     def handle_connection_error(self):
-        self.screen.fill(BG_COLOR)
-        draw_text(self.screen, "You are offline.", self.font_title, RED, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        draw_text(self.screen, "App cannot run without internet.", self.font_hud, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
-        draw_text(self.screen, "Press ESC to Quit", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
-        
-        pygame.display.flip()
-        
-        for event in pygame.event.get():
+        for event in self.scheduler.events(IDLE_TIMEOUT_MS):
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     return "quit"
-        
+                if event.key == pygame.K_RETURN:
+                    self.state = "login"
+                    return "continue"
+
+        # Only reached without a local score file: scores live in memory
+        # until the background sync gets them to the server
+        if self.scheduler.needs_redraw("connection_error"):
+            self.screen.fill(BG_COLOR)
+            draw_text(self.screen, "You are offline.", self.font_title, RED, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+            draw_text(self.screen, "Scores are kept and will sync once the connection returns,", self.font_hud, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 50))
+            draw_text(self.screen, "but can't be saved on this device, so quitting first loses them.", self.font_hud, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
+            draw_text(self.screen, "Press ENTER to Play or ESC to Quit", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
+            self.scheduler.mark_dirty()
+
         return "continue"
 
-    def handle_login(self):
-        self.screen.fill(BG_COLOR)
-        
-        # Title with shadow
-        title_surf = self.font_title.render("Maze Runner", True, GREEN)
-        shadow_surf = self.font_title.render("Maze Runner", True, (0, 0, 0))
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(shadow_surf, (title_rect.x + 4, title_rect.y + 4))
-        self.screen.blit(title_surf, title_rect)
-        
-        draw_text(self.screen, "Enter Username:", self.font_menu, WHITE, (SCREEN_WIDTH // 2, 230))
-        draw_text(self.screen, "(Alphanumeric only, max 15 chars)", self.font_hud, GRAY, (SCREEN_WIDTH // 2, 260))
-        
+    def draw_login_static(self, surface, has_name):
+        self.draw_title(surface, (SCREEN_WIDTH // 2, 100))
+
+        draw_text(surface, "Enter Username:", self.font_menu, WHITE, (SCREEN_WIDTH // 2, 230))
+        draw_text(surface, "(Alphanumeric only, max 15 chars)", self.font_hud, GRAY, (SCREEN_WIDTH // 2, 260))
+
         # Input Box
         input_rect = pygame.Rect(0, 0, 300, 50)
         input_rect.center = (SCREEN_WIDTH // 2, 320)
-        
-        pygame.draw.rect(self.screen, INPUT_BG_COLOR, input_rect, border_radius=10)
-        pygame.draw.rect(self.screen, BLUE if len(self.username) > 0 else GRAY, input_rect, 2, border_radius=10)
-        
-        text_surf = self.font_menu.render(self.username, True, WHITE)
-        text_rect = text_surf.get_rect(center=input_rect.center)
-        self.screen.blit(text_surf, text_rect)
-        
-        # Blinking Cursor
-        if time.time() % 1 > 0.5:
-            cursor_rect = pygame.Rect(text_rect.right + 2, text_rect.top, 2, text_rect.height)
-            pygame.draw.rect(self.screen, WHITE, cursor_rect)
-        
+
+        pygame.draw.rect(surface, INPUT_BG_COLOR, input_rect, border_radius=10)
+        pygame.draw.rect(surface, BLUE if has_name else GRAY, input_rect, 2, border_radius=10)
+
         # Start Hint
-        if len(self.username) > 0:
-            draw_text(self.screen, "Press ENTER to Start", self.font_hud, GREEN, (SCREEN_WIDTH // 2, 400))
+        if has_name:
+            draw_text(surface, "Press ENTER to Start", self.font_hud, GREEN, (SCREEN_WIDTH // 2, 400))
         else:
-            draw_text(self.screen, "Type your name...", self.font_hud, GRAY, (SCREEN_WIDTH // 2, 400))
+            draw_text(surface, "Type your name...", self.font_hud, GRAY, (SCREEN_WIDTH // 2, 400))
 
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+    def handle_login(self):
+        # Wake up in time for the next cursor blink
+        until_blink = int((0.5 - time.time() % 0.5) * 1000) + 1
+        for event in self.scheduler.events(until_blink):
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_RETURN:
                     if self.username.strip():
                         self.state = "menu"
+                        return "continue"
                 elif event.key == pygame.K_BACKSPACE:
                     self.username = self.username[:-1]
                 else:
                     if len(self.username) < 15 and event.unicode.isalnum():
                         self.username += event.unicode
-        return "continue"
 
-    def handle_menu(self):
-        self.screen.fill(BG_COLOR)
+        cursor_on = time.time() % 1 > 0.5
+        if not self.scheduler.needs_redraw(("login", self.username, cursor_on)):
+            return "continue"
+
+        # Everything but the typed name and the cursor only changes when the
+        # name goes from empty to non-empty and back.
+        has_name = len(self.username) > 0
+        layer = self.static_layer("login", has_name, lambda s: self.draw_login_static(s, has_name))
+        self.screen.blit(layer, (0, 0))
+
+        input_rect = pygame.Rect(0, 0, 300, 50)
+        input_rect.center = (SCREEN_WIDTH // 2, 320)
+
+        text_surf = render_text(self.username, self.font_menu, WHITE)
+        text_rect = text_surf.get_rect(center=input_rect.center)
+        self.screen.blit(text_surf, text_rect)
         
+        # Blinking Cursor
+        if cursor_on:
+            cursor_rect = pygame.Rect(text_rect.right + 2, text_rect.top, 2, text_rect.height)
+            pygame.draw.rect(self.screen, WHITE, cursor_rect)
+
+        self.scheduler.mark_dirty()
+        return "continue"
+
+    def draw_button(self, surface, index, option, is_selected):
+        start_y = 200
+        gap = 60
+
+        btn_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
+        btn_rect.center = (SCREEN_WIDTH // 2, start_y + index * gap)
+
+        color = BUTTON_SELECTED_COLOR if is_selected else BUTTON_COLOR
+        if is_selected:
+             # Add a glow/outline effect
+             pygame.draw.rect(surface, WHITE, btn_rect.inflate(4, 4), border_radius=BUTTON_RADIUS)
+
+        pygame.draw.rect(surface, color, btn_rect, border_radius=BUTTON_RADIUS)
+
+        text_color = BLACK if is_selected else WHITE
+        text_surf = render_text(option, self.font_menu, text_color)
+        text_rect = text_surf.get_rect(center=btn_rect.center)
+        surface.blit(text_surf, text_rect)
+
+    def draw_menu_static(self, surface):
         try:
-            draw_text(self.screen, f"Welcome, {self.username}!", self.font_hud, BLUE, (SCREEN_WIDTH // 2, 40))
+            draw_text(surface, f"Welcome, {self.username}!", self.font_hud, BLUE, (SCREEN_WIDTH // 2, 40))
         except Exception as e:
             logging.error(f"Error drawing welcome text: {e}")
-        
-        title_surf = self.font_title.render("Maze Runner", True, GREEN)
-        shadow_surf = self.font_title.render("Maze Runner", True, (0, 0, 0))
-        title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(shadow_surf, (title_rect.x + 4, title_rect.y + 4))
-        self.screen.blit(title_surf, title_rect)
-        
-        start_y = 200
-        gap = 70
-        
+
+        self.draw_title(surface, (SCREEN_WIDTH // 2, 100))
+
+        # All buttons unselected; the highlight is drawn on top every frame
         for i, option in enumerate(self.options):
-            btn_rect = pygame.Rect(0, 0, BUTTON_WIDTH, BUTTON_HEIGHT)
-            btn_rect.center = (SCREEN_WIDTH // 2, start_y + i * gap)
-            
-            is_selected = (i == self.selected_index)
-            color = BUTTON_SELECTED_COLOR if is_selected else BUTTON_COLOR
-            if is_selected:
-                 # Add a glow/outline effect
-                 pygame.draw.rect(self.screen, WHITE, btn_rect.inflate(4, 4), border_radius=BUTTON_RADIUS)
-            
-            pygame.draw.rect(self.screen, color, btn_rect, border_radius=BUTTON_RADIUS)
-            
-            text_color = BLACK if is_selected else WHITE
-            text_surf = self.font_menu.render(option, True, text_color)
-            text_rect = text_surf.get_rect(center=btn_rect.center)
-            self.screen.blit(text_surf, text_rect)
-            
-        draw_text(self.screen, "Use Arrow Keys to Navigate, Enter to Select", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30))
+            self.draw_button(surface, i, option, False)
 
-        pygame.display.flip()
+        draw_text(surface, "Use Arrow Keys to Navigate, Enter to Select", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30))
 
-        for event in pygame.event.get():
+        if not self.leaderboard.is_online():
+            draw_text(surface, "Offline - scores will sync when you reconnect", self.font_small, YELLOW, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 55))
+
+    def handle_menu(self):
+        for event in self.scheduler.events(IDLE_TIMEOUT_MS):
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
@@ -186,6 +244,12 @@ class MainMenu:
                         self.options[self.selected_index] = f"Difficulty: {new_diff}"
                 elif event.key == pygame.K_RETURN:
                     return self.select_option()
+
+        key = (self.username, tuple(self.options), self.leaderboard.is_online())
+        if self.scheduler.needs_redraw(("menu", key, self.selected_index)):
+            self.screen.blit(self.static_layer("menu", key, self.draw_menu_static), (0, 0))
+            self.draw_button(self.screen, self.selected_index, self.options[self.selected_index], True)
+            self.scheduler.mark_dirty()
         
         return "continue"
 
@@ -194,13 +258,19 @@ class MainMenu:
         if option == "New Game":
             difficulty = self.difficulty_levels[self.current_difficulty_index]
             fps = DIFFICULTY[difficulty]
-            self.game = Game(self.screen, fps, difficulty)
+            self.game = Game(self.screen, fps, difficulty, self.scheduler)
+            self.state = "game"
+        elif option == "Autopilot":
+            # Demo game: not recorded and not scored
+            difficulty = self.difficulty_levels[self.current_difficulty_index]
+            self.game = Game(self.screen, DIFFICULTY[difficulty], difficulty, self.scheduler, record=False, autopilot=True)
             self.state = "game"
         elif option.startswith("Difficulty"):
             self.current_difficulty_index = (self.current_difficulty_index + 1) % len(self.difficulty_levels)
             new_diff = self.difficulty_levels[self.current_difficulty_index]
             self.options[self.selected_index] = f"Difficulty: {new_diff}"
         elif option == "Leaderboard":
+            self.leaderboard_page = 0
             self.state = "leaderboard"
         elif option == "Help":
             self.state = "help"
@@ -222,23 +292,24 @@ class MainMenu:
             logging.info(f"MainMenu: Game returned result '{result}'")
             try:
                 if result == "game_over":
-                    print(f"Game Over. Saving score: {self.username} - {self.game.score} ({self.game.difficulty})")
-                    self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty)
+                    if self.game.autopilot is None:
+                        logging.info(f"Game Over. Saving score: {self.username} - {self.game.score} ({self.game.difficulty})")
+                        self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty, self.game.replay())
                     self.game = None
                     self.state = "menu"
                 elif result == "menu":
                     # User pressed ESC
                     logging.info("MainMenu: Handling menu return")
-                    if self.game.score > 0:
-                        print(f"User returned to menu. Saving score: {self.username} - {self.game.score} ({self.game.difficulty})")
-                        self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty)
+                    if self.game.score > 0 and self.game.autopilot is None:
+                        logging.info(f"User returned to menu. Saving score: {self.username} - {self.game.score} ({self.game.difficulty})")
+                        self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty, self.game.replay())
                     self.game = None
                     self.state = "menu"
                     logging.info("MainMenu: State set to menu")
                 elif result == "quit_app":
                     # User clicked X button
-                    if self.game.score > 0:
-                        self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty)
+                    if self.game.score > 0 and self.game.autopilot is None:
+                        self.leaderboard.add_score(self.username, self.game.score, self.game.difficulty, self.game.replay())
                     return "quit"
             except Exception as e:
                 logging.exception("Exception handling game result")
@@ -247,90 +318,133 @@ class MainMenu:
                 
         return "continue"
 
-    def handle_leaderboard(self):
-        self.screen.fill(BG_COLOR)
-        
-        draw_text(self.screen, "Leaderboard", self.font_title, GREEN, (SCREEN_WIDTH // 2, 50))
-        
+    def draw_leaderboard_tabs(self, surface, y):
+        tab_width, gap = 120, 10
+        total = len(self.leaderboard_tabs) * tab_width + (len(self.leaderboard_tabs) - 1) * gap
+        x = (SCREEN_WIDTH - total) // 2
+        for i, (label, _) in enumerate(self.leaderboard_tabs):
+            tab_rect = pygame.Rect(x + i * (tab_width + gap), y - 15, tab_width, 30)
+            is_selected = (i == self.leaderboard_tab)
+            pygame.draw.rect(surface, BUTTON_SELECTED_COLOR if is_selected else BUTTON_COLOR, tab_rect, border_radius=BUTTON_RADIUS)
+            draw_text(surface, label, self.font_small, BLACK if is_selected else WHITE, tab_rect.center)
+
+    def draw_leaderboard_static(self, surface, loading, rows, rank):
+        draw_text(surface, "Leaderboard", self.font_title, GREEN, (SCREEN_WIDTH // 2, 40))
+
+        self.draw_leaderboard_tabs(surface, 92)
+
         # Table Headers
-        header_y = 100
+        header_y = 135
         # Rank (Center)
-        rank_surf = self.font_hud.render("Rank", True, WHITE)
+        rank_surf = render_text("Rank", self.font_hud, WHITE)
         rank_rect = rank_surf.get_rect(center=(150, header_y))
-        self.screen.blit(rank_surf, rank_rect)
-        
+        surface.blit(rank_surf, rank_rect)
+
         # Player (Left)
-        player_surf = self.font_hud.render("Player", True, WHITE)
+        player_surf = render_text("Player", self.font_hud, WHITE)
         player_rect = player_surf.get_rect(midleft=(220, header_y))
-        self.screen.blit(player_surf, player_rect)
+        surface.blit(player_surf, player_rect)
 
         # Difficulty (Left)
-        diff_surf = self.font_hud.render("Difficulty", True, WHITE)
+        diff_surf = render_text("Difficulty", self.font_hud, WHITE)
         diff_rect = diff_surf.get_rect(midleft=(420, header_y))
-        self.screen.blit(diff_surf, diff_rect)
-        
+        surface.blit(diff_surf, diff_rect)
+
         # Score (Right)
-        score_surf = self.font_hud.render("Score", True, WHITE)
+        score_surf = render_text("Score", self.font_hud, WHITE)
         score_rect = score_surf.get_rect(midright=(650, header_y))
-        self.screen.blit(score_surf, score_rect)
-        
+        surface.blit(score_surf, score_rect)
+
         # Divider Line
-        pygame.draw.line(self.screen, DARK_GRAY, (100, header_y + 20), (700, header_y + 20), 2)
-        
-        if self.leaderboard.is_loading:
-             draw_text(self.screen, "Loading scores...", self.font_menu, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+        pygame.draw.line(surface, DARK_GRAY, (100, header_y + 20), (700, header_y + 20), 2)
+
+        if loading:
+             draw_text(surface, "Loading scores...", self.font_menu, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         else:
-            scores = self.leaderboard.get_top_scores()
-            
-            if not scores:
-                draw_text(self.screen, "No scores yet!", self.font_menu, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+            if not rows:
+                draw_text(surface, "No scores yet!", self.font_menu, WHITE, (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
             else:
-                start_y = 140
-                for i, (name, score, difficulty) in enumerate(scores):
-                    color = GREEN if i == 0 else WHITE # Highlight top player
-                    y_pos = start_y + i * 35
-                    
-                    r_surf = self.font_menu.render(str(i+1), True, color)
+                start_y = 175
+                for i, (position, name, score, difficulty) in enumerate(rows):
+                    color = GREEN if position == 1 else WHITE # Highlight top player
+                    y_pos = start_y + i * 32
+
+                    r_surf = render_text(str(position), self.font_menu, color)
                     r_rect = r_surf.get_rect(center=(150, y_pos))
-                    self.screen.blit(r_surf, r_rect)
-                    
-                    n_surf = self.font_menu.render(name, True, color)
+                    surface.blit(r_surf, r_rect)
+
+                    n_surf = render_text(name, self.font_menu, color)
                     n_rect = n_surf.get_rect(midleft=(220, y_pos))
-                    self.screen.blit(n_surf, n_rect)
+                    surface.blit(n_surf, n_rect)
 
-                    d_surf = self.font_menu.render(str(difficulty), True, color)
+                    d_surf = render_text(str(difficulty), self.font_menu, color)
                     d_rect = d_surf.get_rect(midleft=(420, y_pos))
-                    self.screen.blit(d_surf, d_rect)
-                    
-                    s_surf = self.font_menu.render(str(score), True, color)
+                    surface.blit(d_surf, d_rect)
+
+                    s_surf = render_text(str(score), self.font_menu, color)
                     s_rect = s_surf.get_rect(midright=(650, y_pos))
-                    self.screen.blit(s_surf, s_rect)
-            
-        draw_text(self.screen, "Press ESC to return", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
-        pygame.display.flip()
+                    surface.blit(s_surf, s_rect)
+
+        label, difficulty = self.leaderboard_tabs[self.leaderboard_tab]
+        if difficulty is not None:
+            if rank:
+                score, position, total = rank
+                percent = max(1, round(position * 100 / max(total, 1)))
+                rank_text = f"Your rank: #{position} of {total} (top {percent}%)"
+                draw_text(surface, rank_text, self.font_hud, BLUE, (SCREEN_WIDTH // 2, 505))
+            elif rank == ():
+                draw_text(surface, f"You have no {label} score yet", self.font_hud, GRAY, (SCREEN_WIDTH // 2, 505))
+            draw_text(surface, f"Page {self.leaderboard_page + 1}", self.font_small, GRAY, (SCREEN_WIDTH - 100, 505))
+
+        draw_text(surface, "Left/Right: Difficulty   Up/Down: Page   ESC: Back", self.font_small, GRAY, (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
 
-        for event in pygame.event.get():
+    def handle_leaderboard(self):
+        # Fetches finish in the background, so look again soon while waiting on one
+        waiting = self.leaderboard.in_flight or self.leaderboard.is_loading
+        timeout = POLL_TIMEOUT_MS if waiting else IDLE_TIMEOUT_MS
+        for event in self.scheduler.events(timeout):
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.state = "menu"
+                    return "continue"
+                elif event.key == pygame.K_LEFT:
+                    self.leaderboard_tab = (self.leaderboard_tab - 1) % len(self.leaderboard_tabs)
+                    self.leaderboard_page = 0
+                elif event.key == pygame.K_RIGHT:
+                    self.leaderboard_tab = (self.leaderboard_tab + 1) % len(self.leaderboard_tabs)
+                    self.leaderboard_page = 0
+                elif event.key == pygame.K_UP and self.leaderboard_page > 0:
+                    self.leaderboard_page -= 1
+                elif event.key == pygame.K_DOWN and self.leaderboard_has_more:
+                    self.leaderboard_page += 1
+
+        _, difficulty = self.leaderboard_tabs[self.leaderboard_tab]
+        # Cached rows (possibly from the local store) show right away
+        rows, self.leaderboard_has_more = self.leaderboard.get_page(difficulty, self.leaderboard_page)
+        loading = rows is None or (self.leaderboard.is_loading and not rows)
+        rank = None if difficulty is None else self.leaderboard.get_rank(self.username, difficulty)
+        key = (self.leaderboard_tab, self.leaderboard_page, loading, tuple(rows or ()), rank)
+        if self.scheduler.needs_redraw(("leaderboard", key)):
+            layer = self.static_layer("leaderboard", key, lambda s: self.draw_leaderboard_static(s, loading, rows, rank))
+            self.screen.blit(layer, (0, 0))
+            self.scheduler.mark_dirty()
         return "continue"
 
-    def handle_help(self):
-        self.screen.fill(BG_COLOR)
-        draw_text(self.screen, "Help", self.font_title, BLUE, (SCREEN_WIDTH // 2, 40))
+    def draw_help_static(self, surface):
+        draw_text(surface, "Help", self.font_title, BLUE, (SCREEN_WIDTH // 2, 40))
         
         # Help Box - Reduced size to prevent overflow
         box_width, box_height = 700, 480
         box_rect = pygame.Rect(0, 0, box_width, box_height)
         box_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 25)
-        pygame.draw.rect(self.screen, DARK_GRAY, box_rect, border_radius=15)
-        pygame.draw.rect(self.screen, WHITE, box_rect, 2, border_radius=15)
+        pygame.draw.rect(surface, DARK_GRAY, box_rect, border_radius=15)
+        pygame.draw.rect(surface, WHITE, box_rect, 2, border_radius=15)
         
         # --- Section 1: Controls (Top) ---
         section1_y = box_rect.top + 30
-        draw_text(self.screen, "Controls", self.font_menu, GREEN, (SCREEN_WIDTH // 2, section1_y))
+        draw_text(surface, "Controls", self.font_menu, GREEN, (SCREEN_WIDTH // 2, section1_y))
         
         controls = [
             ("Arrow Keys", "Move Snake"),
@@ -348,22 +462,22 @@ class MainMenu:
             y_pos = ctrl_start_y + i * row_spacing
             
             # Key (Right Aligned to center - gap)
-            k_surf = self.font_hud.render(key, True, YELLOW)
+            k_surf = render_text(key, self.font_hud, YELLOW)
             k_rect = k_surf.get_rect(midright=(SCREEN_WIDTH // 2 - center_gap, y_pos))
-            self.screen.blit(k_surf, k_rect)
+            surface.blit(k_surf, k_rect)
             
             # Action (Left Aligned to center + gap)
-            a_surf = self.font_small.render(action, True, WHITE)
+            a_surf = render_text(action, self.font_small, WHITE)
             a_rect = a_surf.get_rect(midleft=(SCREEN_WIDTH // 2 + center_gap, y_pos))
-            self.screen.blit(a_surf, a_rect)
+            surface.blit(a_surf, a_rect)
 
         # --- Divider ---
         divider_y = ctrl_start_y + len(controls) * row_spacing + 15
-        pygame.draw.line(self.screen, GRAY, (box_rect.left + 100, divider_y), (box_rect.right - 100, divider_y), 1)
+        pygame.draw.line(surface, GRAY, (box_rect.left + 100, divider_y), (box_rect.right - 100, divider_y), 1)
 
         # --- Section 2: Rules (Bottom) ---
         section2_y = divider_y + 30
-        draw_text(self.screen, "Rules", self.font_menu, GREEN, (SCREEN_WIDTH // 2, section2_y))
+        draw_text(surface, "Rules", self.font_menu, GREEN, (SCREEN_WIDTH // 2, section2_y))
         
         rules = [
             "Eat Red Food to Grow",
@@ -377,16 +491,21 @@ class MainMenu:
         for i, rule in enumerate(rules):
             y_pos = rules_start_y + i * row_spacing
             # Centered bullet points
-            r_surf = self.font_hud.render(f"•  {rule}", True, WHITE)
+            r_surf = render_text(f"•  {rule}", self.font_hud, WHITE)
             r_rect = r_surf.get_rect(center=(SCREEN_WIDTH // 2, y_pos))
-            self.screen.blit(r_surf, r_rect)
+            surface.blit(r_surf, r_rect)
 
-        pygame.display.flip()
-
-        for event in pygame.event.get():
+    def handle_help(self):
+        for event in self.scheduler.events(IDLE_TIMEOUT_MS):
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     self.state = "menu"
+                    return "continue"
+
+        # Nothing on this screen changes while it is shown
+        if self.scheduler.needs_redraw("help"):
+            self.screen.blit(self.static_layer("help", None, self.draw_help_static), (0, 0))
+            self.scheduler.mark_dirty()
         return "continue"
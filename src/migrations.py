@@ -0,0 +1,108 @@
+import logging
+import psycopg2.errors
+
+# Key for pg_advisory_xact_lock, shared by every client of the database
+MIGRATION_LOCK_ID = 0x4D52534D # "MRSM"
+
+# Ordered schema steps: (version, description, statements).
+# Append new steps at the end and never edit one that has shipped.
+# Steps 1-3 use IF NOT EXISTS so databases set up before schema_version
+# existed are adopted as they are.
+MIGRATIONS = [
+    (1, "scores table with one row per player and difficulty", [
+        """
+        CREATE TABLE IF NOT EXISTS scores (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(50) NOT NULL,
+            score INTEGER NOT NULL,
+            difficulty VARCHAR(20) DEFAULT 'Medium',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "ALTER TABLE scores ADD COLUMN IF NOT EXISTS difficulty VARCHAR(20) DEFAULT 'Medium'",
+        # Unique index so uploads can use ON CONFLICT
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_scores_user_diff ON scores (username, difficulty)",
+    ]),
+    (2, "upload key for idempotent score sync", [
+        "ALTER TABLE scores ADD COLUMN IF NOT EXISTS upload_key VARCHAR(64)",
+    ]),
+    (3, "per-difficulty ranking index", [
+        # id makes the order total for keyset paging
+        "CREATE INDEX IF NOT EXISTS idx_scores_diff_score ON scores (difficulty, score DESC, created_at, id)",
+    ]),
+    (4, "replays and verification status", [
+        "ALTER TABLE scores ADD COLUMN replay BYTEA",
+        # Rows uploaded before replays existed can't be checked; keep showing them
+        "ALTER TABLE scores ADD COLUMN verification VARCHAR(10) NOT NULL DEFAULT 'legacy'",
+        "ALTER TABLE scores ALTER COLUMN verification SET DEFAULT 'pending'",
+        "ALTER TABLE scores ADD COLUMN verified_at TIMESTAMP",
+        # The verifier's work queue stays small however big the table gets
+        "CREATE INDEX idx_scores_pending ON scores (id) WHERE verification = 'pending'",
+        # Leaderboard queries skip rejected rows; carrying verification in the
+        # ranking index keeps the rank counts index-only
+        "CREATE INDEX idx_scores_rank ON scores (difficulty, score DESC, created_at, id) INCLUDE (verification)",
+        "DROP INDEX IF EXISTS idx_scores_diff_score",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def current_version(conn):
+    """Schema version of the database, 0 if it was never migrated.
+
+    This is the only query a client runs when the schema is up to date.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            version = cur.fetchone()[0]
+        conn.rollback()
+        return version
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+
+def migrate(conn):
+    """Bring the schema up to LATEST_VERSION. Returns the versions applied.
+
+    Clients launched at the same time serialize on an advisory lock; the
+    ones that get it second find the work done and apply nothing. All steps
+    run in one transaction, so a failure leaves the schema as it was.
+    """
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            # Released automatically at commit or rollback
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+            cur.execute(CREATE_VERSION_TABLE)
+            cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            version = cur.fetchone()[0]
+            for step, description, statements in MIGRATIONS:
+                if step <= version:
+                    continue
+                logging.info(f"Applying schema migration {step}: {description}")
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                    (step, description),
+                )
+                applied.append(step)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
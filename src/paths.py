@@ -0,0 +1,19 @@
+import os
+import sys
+
+APP_DIR_NAME = "Maze Runner"
+
+def user_data_dir():
+    """Per-user directory for caches and local data, created on first use."""
+    if sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Application Support")
+    elif sys.platform.startswith("win"):
+        base = os.getenv("APPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Roaming")
+    else:
+        base = os.getenv("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base, APP_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def user_data_path(*parts):
+    return os.path.join(user_data_dir(), *parts)
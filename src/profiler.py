@@ -0,0 +1,172 @@
+import time
+from array import array
+import pygame
+
+# Frame phases. Each mark(phase) call charges the time since the previous
+# mark to that phase, so the phases of a frame add up to the whole frame.
+EVENTS = 0 # Polling and handling input
+UPDATE = 1 # Game steps (Snake.move and the rest of engine.step)
+DRAW = 2 # Game.draw or the menu screen, minus text rendering
+TEXT = 3 # font.render() calls that missed the text cache
+PRESENT = 4 # display.flip/update, and drawing the overlay
+WAIT = 5 # Sleeping in clock.tick() or waiting for events
+PHASES = ("events", "update", "draw", "text", "present", "wait")
+
+TOGGLE_KEY = pygame.K_F3
+EXPORT_KEY = pygame.K_F4
+
+HISTORY = 1200 # Frames kept, 20 seconds at 60 fps
+
+# Overlay layout: one bar per frame, scaled so GRAPH_MS fills the height
+OVERLAY_SIZE = (320, 150)
+GRAPH_MS = 50.0
+STATS_INTERVAL = 0.5 # Seconds between text updates
+
+
+def _noop(*args):
+    pass
+
+
+class FrameProfiler:
+    """Per-phase frame times in a preallocated ring buffer, with an overlay.
+
+    Off by default. While off, mark(), add() and end_frame() are a no-op
+    function stored on the instance, so the instrumented loops pay for a
+    call and nothing else. F3 (handled in FrameScheduler.events) turns it
+    on together with the overlay, F4 writes the samples to a CSV file.
+    """
+
+    def __init__(self, capacity=HISTORY):
+        self.capacity = capacity
+        # samples[frame * len(PHASES) + phase] in seconds, totals[frame] the whole frame
+        self.samples = array('d', bytes(8 * capacity * len(PHASES)))
+        self.totals = array('d', bytes(8 * capacity))
+        self.index = 0 # Frame being recorded
+        self.count = 0 # Finished frames in the buffer
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.enabled = False
+        self.overlay = None
+        self.stats = None
+        self.stats_at = 0.0
+        self.disable()
+
+    def enable(self):
+        self.enabled = True
+        self.index = 0
+        self.count = 0
+        self.samples[0:len(PHASES)] = array('d', bytes(8 * len(PHASES)))
+        self.frame_start = self.last = time.perf_counter()
+        self.mark = self._mark
+        self.add = self._add
+        self.end_frame = self._end_frame
+
+    def disable(self):
+        self.enabled = False
+        self.mark = self.add = self.end_frame = _noop
+        self.overlay = None
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def _mark(self, phase):
+        now = time.perf_counter()
+        self.samples[self.index * len(PHASES) + phase] += now - self.last
+        self.last = now
+
+    def _add(self, phase, seconds):
+        """Charge time measured separately (nested in another phase) to phase."""
+        self.samples[self.index * len(PHASES) + phase] += seconds
+        self.last += seconds # Not part of the phase it happened in
+
+    def _end_frame(self):
+        now = time.perf_counter()
+        self.samples[self.index * len(PHASES) + WAIT] += now - self.last
+        self.totals[self.index] = now - self.frame_start
+        self.frame_start = self.last = now
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        row = self.index * len(PHASES)
+        for phase in range(len(PHASES)):
+            self.samples[row + phase] = 0.0
+
+    def frames(self):
+        """Indices of the recorded frames, oldest first."""
+        start = (self.index - self.count) % self.capacity
+        return [(start + i) % self.capacity for i in range(self.count)]
+
+    def percentiles(self, fractions=(0.5, 0.95, 0.99)):
+        """Frame times in ms at the given fractions (nearest rank)."""
+        totals = sorted(self.totals[i] for i in self.frames())
+        if not totals:
+            return [0.0 for _ in fractions]
+        return [totals[min(len(totals) - 1, int(f * len(totals)))] * 1000 for f in fractions]
+
+    def export_csv(self, path=None):
+        """Write one row per recorded frame, in ms. Returns the path."""
+        import csv
+        if path is None:
+            from datetime import datetime
+            from src.paths import user_data_path
+            path = user_data_path(f"frame-profile-{datetime.now():%Y%m%d-%H%M%S}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame", "total_ms") + tuple(f"{name}_ms" for name in PHASES))
+            for n, i in enumerate(self.frames()):
+                row = i * len(PHASES)
+                writer.writerow([n, f"{self.totals[i] * 1000:.3f}"]
+                                + [f"{self.samples[row + p] * 1000:.3f}" for p in range(len(PHASES))])
+        return path
+
+    def draw_overlay(self, surface):
+        """Frame-time graph and percentiles in the bottom-left corner. Returns its rect."""
+        if self.overlay is None:
+            self.overlay = pygame.Surface(OVERLAY_SIZE).convert(surface)
+        overlay = self.overlay
+        width, height = OVERLAY_SIZE
+        graph_top = 40
+        graph_height = height - graph_top - 4
+        overlay.fill((16, 16, 16))
+
+        # Newest frame on the right; the two lines are 60 and 30 fps
+        frames = self.frames()[-(width - 8):]
+        scale = graph_height / (GRAPH_MS / 1000)
+        for ms in (1000 / 60, 1000 / 30):
+            y = height - 4 - int(ms / 1000 * scale)
+            pygame.draw.line(overlay, (70, 70, 70), (4, y), (width - 4, y))
+        x = width - 4 - len(frames)
+        for i in frames:
+            total = self.totals[i]
+            bar = min(graph_height, int(total * scale))
+            color = (80, 200, 80) if total < 1 / 55 else (230, 200, 60) if total < 1 / 28 else (230, 70, 70)
+            pygame.draw.line(overlay, color, (x, height - 4), (x, height - 4 - bar))
+            x += 1
+
+        # Text changes twice a second, so it's readable and cheap
+        now = time.perf_counter()
+        if self.stats is None or now - self.stats_at >= STATS_INTERVAL:
+            from src.fonts import get_font
+            font = get_font(14)
+            p50, p95, p99 = self.percentiles()
+            means = [0.0] * len(PHASES)
+            for i in frames:
+                for p in range(len(PHASES)):
+                    means[p] += self.samples[i * len(PHASES) + p]
+            means = [m * 1000 / max(len(frames), 1) for m in means]
+            line1 = f"frame ms  p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}"
+            line2 = "  ".join(f"{name[:3]} {m:.2f}" for name, m in zip(PHASES, means))
+            # font.render() directly: these strings would only churn the text cache
+            self.stats = (font.render(line1, True, (255, 255, 255)), font.render(line2, True, (200, 200, 200)))
+            self.stats_at = now
+        overlay.blit(self.stats[0], (6, 4))
+        overlay.blit(self.stats[1], (6, 21))
+
+        rect = overlay.get_rect(bottomleft=(0, surface.get_height()))
+        surface.blit(overlay, rect)
+        return rect
+
+
+frame_profiler = FrameProfiler()
@@ -0,0 +1,185 @@
+import pygame
+from src.constants import *
+from src.engine import EVENT_DIED, STOPPED
+from src import sprites
+from src.fonts import render_text, digit_atlas
+
+class DirtyRectRenderer:
+    """Draws the gameplay screen by repainting only the grid cells that changed.
+
+    From one tick to the next only the new head, the old head (eyes become a
+    body segment), the vacated tail cell, the food and changed HUD text need
+    repainting. draw() returns the rects to hand to pygame.display.update(),
+    or None after a full redraw so the caller can flip the whole frame.
+    Call invalidate() to force a full redraw (pause, reset, resize, expose).
+
+    Frames drawn between two steps pass alpha, the fraction of the step
+    that has elapsed: the head slides from the neck into its new cell and
+    the tail slides out of the cell it vacated.
+    """
+
+    def __init__(self, screen, font):
+        self.screen = screen
+        self.font = font
+        self.size = screen.get_size()
+        self.full_redraw = True
+        self.dirty_cells = set()
+        self.last_head = None
+        self.last_food = None
+        self.hud = {} # center -> (label, value, rect)
+        self.motion = None # (neck, head, vacated, tail, direction) of the last step
+
+    def invalidate(self):
+        self.full_redraw = True
+
+    def note_step(self, snake, events):
+        """Record the cells touched by one engine step."""
+        if EVENT_DIED in events:
+            # Snake was reset to the start position
+            self.invalidate()
+            self.motion = None
+            return
+        self.dirty_cells.add(snake.head_cell)
+        if snake.vacated_cell is not None:
+            self.dirty_cells.add(snake.vacated_cell)
+        if snake.direction == STOPPED:
+            self.motion = None
+        else:
+            neck = snake.cell_at(1) if snake.size > 1 else snake.vacated_cell
+            self.motion = (neck, snake.head_cell, snake.vacated_cell, snake.tail_cell, snake.direction)
+
+    def motion_cells(self):
+        if self.motion is None:
+            return []
+        return [cell for cell in self.motion[:4] if cell is not None]
+
+    def slide_offset(self, snake, cell, towards, alpha):
+        """Pixel position of a sprite moving from an adjacent cell into cell.
+
+        Moves across a wrapped edge come in from the edge of the board.
+        """
+        x, y = snake.cell_to_pixel(cell)
+        dx, dy = towards
+        back = (1.0 - alpha) * GRID_SIZE
+        return (round(x - dx * back), round(y - dy * back))
+
+    def draw_motion(self, snake, alpha):
+        """Draw the sliding tail and head on top of the repainted cells."""
+        neck, head, vacated, tail, direction = self.motion
+        images = sprites.snake_sprites(GRID_SIZE, snake.color)
+        if vacated is not None:
+            width = snake.grid_width
+            (vy, vx), (ty, tx) = divmod(vacated, width), divmod(tail, width)
+            # Step from vacated to tail, folded back across the wrapped edge
+            dx = (tx - vx + 1) % width - 1
+            dy = (ty - vy + 1) % snake.grid_height - 1
+            self.screen.blit(images["body"], self.slide_offset(snake, tail, (dx, dy), alpha))
+        self.screen.blit(images["head"][direction], self.slide_offset(snake, head, direction, alpha))
+
+    def cell_rect(self, snake, cell):
+        x, y = snake.cell_to_pixel(cell)
+        return pygame.Rect(x, y, GRID_SIZE, GRID_SIZE)
+
+    def cells_in(self, snake, rect):
+        rect = rect.clip(pygame.Rect(0, 0, snake.grid_width * GRID_SIZE, snake.grid_height * GRID_SIZE))
+        cells = []
+        for y in range(rect.top // GRID_SIZE, (rect.bottom - 1) // GRID_SIZE + 1):
+            for x in range(rect.left // GRID_SIZE, (rect.right - 1) // GRID_SIZE + 1):
+                cells.append(y * snake.grid_width + x)
+        return cells
+
+    def update_hud(self, hud):
+        """Lay out HUD items that changed. Returns the screen areas they affect."""
+        changed = []
+        atlas = digit_atlas(self.font, WHITE)
+        for label, value, center in hud:
+            current = self.hud.get(center)
+            if current is not None and current[0] == label and current[1] == value:
+                continue
+            label_surf = render_text(label, self.font, WHITE)
+            width, height = atlas.size(value)
+            rect = pygame.Rect(0, 0, label_surf.get_width() + width, max(label_surf.get_height(), height))
+            rect.center = center
+            if current is not None:
+                changed.append(current[2])
+            changed.append(rect)
+            self.hud[center] = (label, value, rect)
+        return changed
+
+    def draw_hud_item(self, label, value, rect):
+        # Static label from the text cache, digits from the glyph atlas
+        label_surf = render_text(label, self.font, WHITE)
+        self.screen.blit(label_surf, rect.topleft)
+        digit_atlas(self.font, WHITE).draw(self.screen, value, (rect.x + label_surf.get_width(), rect.y))
+
+    def draw(self, snake, food, hud, alpha=1.0):
+        """Draw the frame. hud is a list of (label, value, center) items."""
+        if self.screen.get_size() != self.size:
+            self.size = self.screen.get_size()
+            self.full_redraw = True
+            sprites.clear_cache()
+
+        changed_hud = self.update_hud(hud)
+
+        if self.full_redraw:
+            self.screen.fill(BG_COLOR)
+            snake.draw(self.screen)
+            food.draw(self.screen)
+            if self.motion is not None and alpha < 1.0:
+                self.repaint(snake, food, set(self.motion_cells()), alpha)
+            for label, value, rect in self.hud.values():
+                self.draw_hud_item(label, value, rect)
+            self.full_redraw = False
+            self.dirty_cells.clear()
+            self.last_head = snake.head_cell
+            self.last_food = food.cell
+            return None
+
+        cells = self.dirty_cells
+        cells.update(self.motion_cells())
+        cells.add(snake.head_cell)
+        if self.last_head is not None:
+            cells.add(self.last_head)
+        if food.cell != self.last_food:
+            for cell in (self.last_food, food.cell):
+                if cell is not None:
+                    cells.add(cell)
+        for rect in changed_hud:
+            cells.update(self.cells_in(snake, rect))
+
+        # Text is blended onto the background, so HUD items over a repainted
+        # cell are repainted as a whole before the text goes back on top.
+        hud_rects = [rect for _, _, rect in self.hud.values()]
+        for cell in list(cells):
+            rect = self.cell_rect(snake, cell)
+            for hud_rect in hud_rects:
+                if rect.colliderect(hud_rect):
+                    cells.update(self.cells_in(snake, hud_rect))
+
+        rects = self.repaint(snake, food, cells, alpha)
+
+        for label, value, rect in self.hud.values():
+            if rect.collidelist(rects) != -1:
+                self.draw_hud_item(label, value, rect)
+
+        cells.clear()
+        self.last_head = snake.head_cell
+        self.last_food = food.cell
+        return rects
+
+    def repaint(self, snake, food, cells, alpha):
+        """Repaint whole cells from the model, then the moving sprites."""
+        head = snake.head_cell
+        moving = self.motion is not None and alpha < 1.0
+        rects = []
+        for cell in cells:
+            rect = self.cell_rect(snake, cell)
+            self.screen.fill(BG_COLOR, rect)
+            if snake.occupancy[cell] and not (moving and cell == head):
+                snake.draw_segment(self.screen, (rect.x, rect.y), cell == head)
+            if cell == food.cell:
+                food.draw(self.screen)
+            rects.append(rect)
+        if moving:
+            self.draw_motion(snake, alpha)
+        return rects
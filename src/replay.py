@@ -0,0 +1,298 @@
+import os
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from src.engine import new_game, step, DIRECTIONS, DIRECTION_CODES
+from src.paths import user_data_path
+
+# Replay file layout (all integers are unsigned LEB128 varints):
+#   magic "MRRP", format version byte
+#   seed, grid width, grid height, difficulty (length + UTF-8 bytes)
+#   one varint per input: (ticks since the previous input << 2) | direction
+#     (the first input counts from tick -1, so a record is never 0)
+#   0, then the footer: final tick, score, lives, flags (1 = game over, 2 = won)
+# A file without the footer was cut short (crash); it still plays back.
+MAGIC = b"MRRP"
+VERSION = 1
+REPLAY_DIR = "replays"
+REPLAY_SUFFIX = ".mrr"
+MAX_REPLAYS = 500 # Oldest files are deleted beyond this
+
+FLAG_GAME_OVER = 1
+FLAG_WON = 2
+
+# Encoded bytes buffered before they are handed to the writer thread
+FLUSH_BYTES = 4096
+# Longest the app waits at exit for writer threads to finish their files
+EXIT_TIMEOUT = 5.0
+
+_writers = set() # Writer threads that haven't closed their file yet
+
+
+class ReplayError(Exception):
+    """The data is not a replay this version can read."""
+
+
+def encode_varint(value, out):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos):
+    """Returns (value, position after it)."""
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise EOFError("replay ends inside a number")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def replay_dir():
+    path = user_data_path(REPLAY_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class Replay:
+    """A decoded replay: header fields, inputs and (if present) the footer."""
+
+    def __init__(self, seed, difficulty, grid_width, grid_height, inputs, final=None):
+        self.seed = seed
+        self.difficulty = difficulty
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.inputs = inputs # [(tick, direction), ...] in tick order
+        self.final = final # (tick, score, lives, flags) or None if truncated
+
+    @property
+    def complete(self):
+        return self.final is not None
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ReplayError("not a Maze Runner replay")
+        if len(data) < 5 or data[4] != VERSION:
+            raise ReplayError(f"unsupported replay version {data[4] if len(data) > 4 else None}")
+        try:
+            pos = 5
+            seed, pos = decode_varint(data, pos)
+            grid_width, pos = decode_varint(data, pos)
+            grid_height, pos = decode_varint(data, pos)
+            length, pos = decode_varint(data, pos)
+            difficulty = bytes(data[pos:pos + length]).decode("utf-8")
+            pos += length
+        except (EOFError, UnicodeDecodeError) as e:
+            raise ReplayError(f"bad replay header: {e}")
+
+        inputs = []
+        final = None
+        tick = -1
+        try:
+            while pos < len(data):
+                value, pos = decode_varint(data, pos)
+                if value == 0:
+                    final = []
+                    for _ in range(4):
+                        field, pos = decode_varint(data, pos)
+                        final.append(field)
+                    final = tuple(final)
+                    break
+                tick += value >> 2
+                inputs.append((tick, DIRECTIONS[value & 3]))
+        except EOFError:
+            pass # Truncated: keep the inputs read so far
+        return cls(seed, difficulty, grid_width, grid_height, inputs, final)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class ReplayRecorder:
+    """Encodes one game's inputs and streams them to a file.
+
+    record() only appends a few bytes to a buffer; full buffers and the
+    final footer go to a background thread that does the file I/O, so
+    recording never blocks a frame. Pass path=None to keep the replay in
+    memory only (data holds the encoded bytes either way).
+    """
+
+    def __init__(self, seed, difficulty, grid_width, grid_height, path=None):
+        self.path = path
+        self.data = bytearray()
+        self.buffer = bytearray(MAGIC)
+        self.buffer.append(VERSION)
+        encode_varint(seed, self.buffer)
+        encode_varint(grid_width, self.buffer)
+        encode_varint(grid_height, self.buffer)
+        name = difficulty.encode("utf-8")
+        encode_varint(len(name), self.buffer)
+        self.buffer += name
+        self.last_tick = -1
+        self.finished = False
+        self.queue = None
+        self.thread = None
+        if path is not None:
+            self.queue = queue.Queue()
+            self.thread = threading.Thread(target=self._write, name="replay-writer", daemon=True)
+            _writers.add(self.thread)
+            self.thread.start()
+
+    def record(self, tick, direction):
+        """Note that direction was applied at the start of tick."""
+        encode_varint(((tick - self.last_tick) << 2) | DIRECTION_CODES[direction], self.buffer)
+        self.last_tick = tick
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        chunk = bytes(self.buffer)
+        self.buffer = bytearray()
+        self.data += chunk
+        if self.queue is not None:
+            self.queue.put(chunk)
+
+    def finish(self, state):
+        """Write the footer with the final tick, score and lives, and close the file."""
+        if self.finished:
+            return
+        self.finished = True
+        flags = (FLAG_GAME_OVER if state.game_over else 0) | (FLAG_WON if state.won else 0)
+        self.buffer.append(0)
+        for value in (state.tick, state.score, max(state.lives, 0), flags):
+            encode_varint(value, self.buffer)
+        self.flush()
+        if self.queue is not None:
+            self.queue.put(None)
+
+    def wait(self, timeout=None):
+        """Block until everything queued so far is on disk (or timeout)."""
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _write(self):
+        try:
+            with open(self.path, "wb") as f:
+                while True:
+                    chunk = self.queue.get()
+                    if chunk is None:
+                        break
+                    f.write(chunk)
+                    f.flush()
+        except OSError as e:
+            logging.error(f"Could not save replay {self.path}: {e}")
+        finally:
+            _writers.discard(self.thread)
+
+
+def wait_for_writers(timeout=EXIT_TIMEOUT):
+    """Let writer threads finish their files; registered to run at exit.
+
+    The threads are daemons so a stuck disk can't hang the app, which also
+    means exiting would otherwise cut a replay saved just before it short.
+    """
+    deadline = time.monotonic() + timeout
+    for thread in list(_writers):
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+
+atexit.register(wait_for_writers)
+
+
+def list_replays():
+    """Paths of saved replays, oldest first."""
+    folder = replay_dir()
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(REPLAY_SUFFIX))
+
+
+def prune_replays(keep=MAX_REPLAYS):
+    for path in list_replays()[:-keep or None]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def new_replay_path(difficulty, seed):
+    prune_replays(MAX_REPLAYS - 1)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(replay_dir(), f"{stamp}-{difficulty.lower()}-{seed:016x}{REPLAY_SUFFIX}")
+
+
+def play(replay, until=None):
+    """Re-simulate a replay headless. Returns the final GameState.
+
+    Runs to the recorded final tick (or until), or until the game ends if
+    the replay has no footer.
+    """
+    state = new_game(replay.seed, grid_width=replay.grid_width, grid_height=replay.grid_height)
+    if until is None and replay.final is not None:
+        until = replay.final[0]
+    inputs = replay.inputs
+    index = 0
+    while not state.game_over and (until is None or state.tick < until):
+        action = None
+        if index < len(inputs) and inputs[index][0] == state.tick:
+            action = inputs[index][1]
+            index += 1
+        elif until is None and index >= len(inputs):
+            break # Truncated replay: nothing left to drive it
+        step(state, action)
+    return state
+
+
+def matches(replay, state):
+    """True if state ends the way the replay's footer says it did."""
+    if replay.final is None:
+        return False
+    flags = (FLAG_GAME_OVER if state.game_over else 0) | (FLAG_WON if state.won else 0)
+    return (state.tick, state.score, max(state.lives, 0), flags) == replay.final
+
+
+def main(paths):
+    """python -m src.replay FILE... : re-simulate replays and check their footers."""
+    if not paths:
+        paths = list_replays()
+    failures = 0
+    total_ticks = 0
+    started = time.perf_counter()
+    for path in paths:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ReplayError) as e:
+            print(f"{path}: {e}")
+            failures += 1
+            continue
+        state = play(replay)
+        total_ticks += state.tick
+        if replay.complete:
+            ok = matches(replay, state)
+            failures += not ok
+            status = "ok" if ok else f"MISMATCH (recorded {replay.final})"
+        else:
+            status = "truncated"
+        print(f"{os.path.basename(path)}: {replay.difficulty}, {state.tick} ticks, score {state.score} - {status}")
+    elapsed = time.perf_counter() - started
+    if paths and elapsed > 0:
+        print(f"{len(paths)} replay(s), {total_ticks} ticks in {elapsed:.2f}s ({total_ticks / elapsed:,.0f} ticks/s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+import pygame
+import logging
+from src import profiler, log
+from src.profiler import frame_profiler
+
+# Longest a static screen sleeps before looking at its state again
+IDLE_TIMEOUT_MS = 500
+# For screens waiting on background work (connecting, leaderboard fetches)
+POLL_TIMEOUT_MS = 100
+# Switches logging to DEBUG and back, on every screen
+LOG_DEBUG_KEY = pygame.K_F5
+
+class FrameScheduler:
+    """Owns presenting frames and pacing the main loop.
+
+    Screens draw only when needs_redraw() says their content changed and then
+    call mark_dirty(), with the changed rects or None for the whole screen.
+    present() pushes that to the display once per frame, and tick() paces the
+    loop. When nothing is waiting to be drawn, events(timeout) blocks on
+    pygame.event.wait() instead of returning at once, so static screens use
+    next to no CPU.
+    """
+
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.key = None # What is on screen now, as given to needs_redraw()
+        self.invalid = True
+        self.full = False
+        self.rects = []
+        self.presents = 0
+
+    def invalidate(self):
+        """Make the next needs_redraw() call return True (screen change, expose)."""
+        self.invalid = True
+
+    def needs_redraw(self, key):
+        """True if the screen must be drawn because key differs from what is shown."""
+        if self.invalid or key != self.key:
+            self.key = key
+            self.invalid = False
+            return True
+        return False
+
+    @property
+    def dirty(self):
+        return self.full or bool(self.rects)
+
+    def mark_dirty(self, rects=None):
+        if rects is None:
+            self.full = True
+        else:
+            self.rects.extend(rects)
+
+    def events(self, timeout=None):
+        """Pending events.
+
+        With a timeout (ms) and nothing to draw, waits up to that long for
+        the first event instead of returning an empty list right away.
+        """
+        if timeout is not None and not self.dirty and not self.invalid:
+            event = pygame.event.wait(timeout)
+            frame_profiler.mark(profiler.WAIT)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events += pygame.event.get()
+        else:
+            events = pygame.event.get()
+
+        for event in events:
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key in (profiler.TOGGLE_KEY, profiler.EXPORT_KEY):
+                events = self.profiler_key(event, events)
+            elif event.type == pygame.KEYDOWN and event.key == LOG_DEBUG_KEY:
+                events = [e for e in events if e is not event]
+                debug = log.toggle_debug()
+                logging.warning(f"Debug logging {'on' if debug else 'off'}")
+        frame_profiler.mark(profiler.EVENTS)
+        return events
+
+    def profiler_key(self, event, events):
+        """F3/F4 work on every screen, so they are handled here and not passed on."""
+        events = [e for e in events if e is not event]
+        if event.key == profiler.TOGGLE_KEY:
+            frame_profiler.toggle()
+            logging.info(f"Frame profiler {'on' if frame_profiler.enabled else 'off'}")
+            # Screens repaint everything, so the overlay appears or goes away cleanly
+            self.invalidate()
+            events.append(pygame.event.Event(pygame.VIDEOEXPOSE))
+        elif frame_profiler.count:
+            try:
+                path = frame_profiler.export_csv()
+                logging.info(f"Frame profile written to {path}")
+            except OSError as e:
+                logging.error(f"Could not write frame profile: {e}")
+        return events
+
+    def present(self):
+        """Show what was marked dirty this frame, if anything. Returns True if it did."""
+        if frame_profiler.enabled:
+            # Drawn over every frame, even ones where nothing else changed
+            rect = frame_profiler.draw_overlay(pygame.display.get_surface())
+            if not self.full:
+                self.rects.append(rect)
+        if self.full:
+            pygame.display.flip()
+        elif self.rects:
+            pygame.display.update(self.rects)
+        else:
+            return False
+        self.full = False
+        self.rects = []
+        self.presents += 1
+        frame_profiler.mark(profiler.PRESENT)
+        return True
+
+    def tick(self, fps=None):
+        """Wait out the rest of the frame. Returns the ms since the last tick."""
+        elapsed = self.clock.tick(fps or self.fps)
+        frame_profiler.end_frame()
+        return elapsed
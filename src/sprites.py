@@ -0,0 +1,71 @@
+import pygame
+from src.constants import BLACK, WHITE
+from src.engine import UP, DOWN, LEFT, RIGHT, STOPPED
+
+HEAD_COLOR = (40, 180, 100) # Slightly darker green for head
+
+# Rasterized once per (grid size, palette) and reused for every frame.
+# A new key (different GRID_SIZE or colours) simply builds a new set.
+_cache = {}
+
+def _convert(surface, alpha):
+    # convert() needs a display mode; headless callers get the raw surface
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+def _head_sprite(grid_size, direction, head_color, eye_color):
+    surface = pygame.Surface((grid_size, grid_size), pygame.SRCALPHA)
+    center = (grid_size // 2, grid_size // 2)
+    radius = grid_size // 2
+    pygame.draw.circle(surface, head_color, center, radius)
+
+    eye_radius = 3
+    eye_offset_x = radius // 2
+    eye_offset_y = radius // 2
+
+    # Default to looking right if stationary
+    dx, dy = direction
+    if dx == 0 and dy == 0:
+        dx = 1
+
+    if dx != 0: # Horizontal
+        eye1 = (center[0] + (dx * eye_offset_x), center[1] - eye_offset_y)
+        eye2 = (center[0] + (dx * eye_offset_x), center[1] + eye_offset_y)
+    else: # Vertical
+        eye1 = (center[0] - eye_offset_x, center[1] + (dy * eye_offset_y))
+        eye2 = (center[0] + eye_offset_x, center[1] + (dy * eye_offset_y))
+
+    pygame.draw.circle(surface, eye_color, eye1, eye_radius)
+    pygame.draw.circle(surface, eye_color, eye2, eye_radius)
+    return _convert(surface, True)
+
+def snake_sprites(grid_size, body_color, head_color=HEAD_COLOR, eye_color=BLACK):
+    """Return {"body": surface, "head": {direction: surface}} for the given look."""
+    key = ("snake", grid_size, body_color, head_color, eye_color)
+    sprites = _cache.get(key)
+    if sprites is None:
+        body = pygame.Surface((grid_size, grid_size), pygame.SRCALPHA)
+        pygame.draw.circle(body, body_color, (grid_size // 2, grid_size // 2), grid_size // 2)
+        heads = {}
+        for direction in (UP, DOWN, LEFT, RIGHT, STOPPED):
+            heads[direction] = _head_sprite(grid_size, direction, head_color, eye_color)
+        sprites = {"body": _convert(body, True), "head": heads}
+        _cache[key] = sprites
+    return sprites
+
+def food_sprite(grid_size, color, border_color=WHITE):
+    key = ("food", grid_size, color, border_color)
+    sprite = _cache.get(key)
+    if sprite is None:
+        sprite = pygame.Surface((grid_size, grid_size))
+        r = sprite.get_rect()
+        pygame.draw.rect(sprite, color, r)
+        pygame.draw.rect(sprite, border_color, r, 1)
+        sprite = _convert(sprite, False)
+        _cache[key] = sprite
+    return sprite
+
+def clear_cache():
+    """Drop every cached sprite, e.g. after the display mode changes."""
+    _cache.clear()
@@ -0,0 +1,161 @@
+import os
+import sys
+import time
+import threading
+
+# Set by a launcher (see build_app.py) to time.time() just before it starts
+# the process, so the report also covers interpreter and bundle start-up.
+LAUNCH_TIME_ENV = "MAZE_RUNNER_LAUNCH_TIME"
+
+REPORT_FILE = "startup-profile.txt"
+
+_profiler = None
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time create_module + exec_module."""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        self._profiler.begin(self._name)
+        try:
+            return self._loader.create_module(spec)
+        except BaseException:
+            self._profiler.end()
+            raise
+
+    def exec_module(self, module):
+        # Put the real loader back before the module body runs, so code that
+        # inspects __loader__ (pkg_resources, importlib.resources) sees it
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.end()
+
+
+class StartupProfiler:
+    """Import tree and start-up milestones, like python -X importtime.
+
+    It is a meta path finder, so it also works inside the PyInstaller bundle
+    where -X options can't be passed. Only modules imported after install()
+    are seen.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        launched = os.getenv(LAUNCH_TIME_ENV)
+        # Time between the launcher starting us and install()
+        self.offset = max(0.0, time.time() - float(launched)) if launched else None
+        self.stacks = {} # thread id -> [[name, start, time spent in child imports], ...]
+        self.imports = [] # (depth, name, start, self seconds, cumulative seconds) in finish order
+        self.marks = [] # (label, seconds since t0)
+
+    def now(self):
+        return time.perf_counter() - self.t0
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self, name)
+                return spec
+        return None
+
+    def begin(self, name):
+        self.stacks.setdefault(threading.get_ident(), []).append([name, self.now(), 0.0])
+
+    def end(self):
+        stack = self.stacks[threading.get_ident()]
+        name, start, children = stack.pop()
+        total = self.now() - start
+        if stack:
+            stack[-1][2] += total
+        self.imports.append((len(stack), name, start, total - children, total))
+
+    def mark(self, label):
+        self.marks.append((label, self.now()))
+
+    def milestone(self, label):
+        for mark, at in self.marks:
+            if mark == label:
+                return at
+        return None
+
+    def report(self, min_ms=0.5):
+        lines = ["Maze Runner start-up profile", ""]
+        if self.offset is not None:
+            lines.append(f"{'process start':<24}{-self.offset * 1000:10.1f} ms")
+        else:
+            lines.append("(launched without a launch time; times start at main.py)")
+        for label, at in self.marks:
+            lines.append(f"{label:<24}{at * 1000:10.1f} ms")
+        if self.offset is not None:
+            lines.append("")
+            for label in ("first frame", "interactive"):
+                at = self.milestone(label)
+                if at is not None:
+                    lines.append(f"{label} since process start: {(at + self.offset) * 1000:.1f} ms")
+
+        lines += ["", "Imports (ms; start is relative to main.py)", f"{'start':>8} | {'self':>8} | {'cumulative':>10} | module"]
+        # Imports finish child first; ordered by start, parents come first again
+        for depth, name, start, self_time, total in sorted(self.imports, key=lambda row: (row[2], row[0])):
+            if total * 1000 >= min_ms:
+                lines.append(f"{start * 1000:8.1f} | {self_time * 1000:8.1f} | {total * 1000:10.1f} | {'  ' * depth}{name}")
+
+        slowest = sorted((row for row in self.imports if row[0] == 0), key=lambda row: row[4], reverse=True)[:10]
+        lines += ["", "Slowest top-level imports"]
+        for depth, name, start, self_time, total in slowest:
+            lines.append(f"{total * 1000:8.1f} ms  {name}")
+        return "\n".join(lines) + "\n"
+
+
+def install():
+    """Start profiling; later imports and mark() calls are recorded."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler()
+        sys.meta_path.insert(0, _profiler)
+    return _profiler
+
+
+def enabled():
+    return _profiler is not None
+
+
+def mark(label):
+    """Record a start-up milestone. Does nothing unless install() was called."""
+    if _profiler is not None:
+        _profiler.mark(label)
+
+
+def finish(path=None):
+    """Stop profiling and write the report. Returns the report path."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    if profiler in sys.meta_path:
+        sys.meta_path.remove(profiler)
+    if path is None:
+        from src.paths import user_data_path
+        path = user_data_path(REPORT_FILE)
+    text = profiler.report()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    # The windowed bundle has no console, the file is the main output
+    if sys.stdout is not None:
+        print(text)
+    return path
@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+
+class SyncEngine:
+    """Background thread that keeps LocalStore and Postgres in step.
+
+    It (re)connects when the server is unreachable, uploads unsynced local
+    rows in batches, and pulls the remote top-N after uploads or when asked
+    via request_pull(). Uploads carry the row's upload key, so a retried
+    batch never duplicates or lowers a score on the server.
+    """
+
+    def __init__(self, store, db, batch_size=100, retry_interval=30.0, on_status=None, on_pull=None):
+        self.store = store
+        self.db = db
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.on_status = on_status
+        self.on_pull = on_pull
+        self.wake = threading.Event()
+        self.pull_requested = True
+        self.stopping = False
+        self.deadline = None
+        self.thread = threading.Thread(target=self._run, name="score-sync", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def notify(self):
+        """New local scores are waiting."""
+        self.wake.set()
+
+    def request_pull(self):
+        self.pull_requested = True
+        self.wake.set()
+
+    def close(self, timeout=5.0):
+        """Try to upload what is left, giving up after timeout seconds."""
+        if not self.thread.is_alive():
+            return
+        self.deadline = time.monotonic() + timeout
+        self.stopping = True
+        self.wake.set()
+        self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            if not self.db.connected and not self.stopping:
+                self.db.connect()
+                if self.on_status:
+                    self.on_status(self.db.connected)
+
+            ok = True
+            if self.db.connected:
+                ok = self.push()
+                if ok and self.pull_requested and not self.stopping:
+                    ok = self.pull()
+
+            if self.stopping:
+                if self.store.unsynced(1):
+                    logging.warning("Score sync stopped with unsynced scores; they will upload next launch")
+                break
+
+            # Retry periodically while offline or with uploads pending
+            pending = not self.db.connected or not ok or bool(self.store.unsynced(1))
+            self.wake.wait(self.retry_interval if pending else None)
+            self.wake.clear()
+
+    def push(self):
+        """Upload unsynced rows in batches. Returns False if a batch failed."""
+        uploaded = False
+        while True:
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                return False
+            rows = self.store.unsynced(self.batch_size)
+            if not rows:
+                break
+            if not self.db.add_scores(rows):
+                return False
+            self.store.mark_synced([row[3] for row in rows])
+            uploaded = True
+        if uploaded:
+            self.pull_requested = True
+        return True
+
+    def pull(self):
+        scores = self.db.get_top_scores()
+        if scores is None:
+            return False
+        self.pull_requested = False
+        scores = [tuple(row) for row in scores]
+        self.store.save_remote_top(scores)
+        if self.on_pull:
+            self.on_pull(scores)
+        return True
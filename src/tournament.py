@@ -0,0 +1,508 @@
+import os
+import sys
+import json
+import random
+import importlib
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.constants import GRID_WIDTH, GRID_HEIGHT, DIFFICULTY
+from src.engine import new_game, step, START_LIVES, EVENT_DIED, DIRECTIONS, REVERSE, neighbour_table
+from src.autopilot import Autopilot, snake_cells
+
+# Headless bot tournaments for tuning DIFFICULTY and the lives rule.
+# Games at every difficulty use the same seeds, so they differ only in
+# how many ticks the bot has to wait between turns.
+
+# A player needs about this long after one turn before the next; the
+# faster the snake, the more cells it covers in between
+REACTION_MS = 250
+
+# Why a life was lost
+BOXED_IN = "boxed_in" # No free cell next to the head
+LATE_TURN = "late_turn" # Too soon after its last turn to turn again
+COLLISION = "collision" # Steered into its own body
+CAUSES = (BOXED_IN, LATE_TURN, COLLISION)
+
+# How a game ended
+WON = "won"
+GAME_OVER = "game_over"
+TIME_UP = "time_up"
+
+
+class AutopilotPolicy(Autopilot):
+    """src.autopilot's player, made to plan around the wait between turns.
+
+    With a turn_delay the path to the food is searched over (cell,
+    direction, ticks until the next turn) rather than cells alone, so it
+    only asks for turns the bot will be allowed to make. When no such path
+    is safe it falls back on Autopilot's own moves.
+    """
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.run_seen = self.run_parent = self.run_queue = array('i')
+        super().__init__(grid_width, grid_height) # Calls reset()
+
+    def reset(self, seed=None, turn_delay=0):
+        super().reset()
+        self.turn_delay = turn_delay
+        self.run = [] # Cells to enter, in order, planned at run_tick from run_head
+        self.run_tick = 0
+        self.run_head = None
+        states = self.capacity * 4 * (turn_delay + 1)
+        if len(self.run_seen) < states:
+            self.run_seen = array('i', bytes(4 * states))
+            self.run_parent = array('i', bytes(4 * states))
+            self.run_queue = array('i', bytes(4 * states))
+
+    def choose(self, state):
+        if not self.turn_delay:
+            return super().choose(state)
+        snake = state.snake
+        head = snake.head_cell
+        food = state.food.cell
+
+        # The bot isn't asked while it waits, so work out how far along the
+        # run the snake has got
+        moved = state.tick - self.run_tick
+        run = self.run
+        if not (run and food == self.path_food and 0 <= moved < len(run)
+                and head == (run[moved - 1] if moved else self.run_head)):
+            self.path_food = food
+            self.run_tick = state.tick
+            self.run_head = head
+            moved = 0
+            run = self.run = self.find_run(snake, head, food) if food is not None else []
+            if run and not self.reaches_tail_after(snake, run[::-1]):
+                run = self.run = []
+            if not run:
+                return super().choose(state)
+
+        code = self.neighbours.index(run[moved], head * 4, head * 4 + 4) - head * 4
+        direction = DIRECTIONS[code]
+        return None if direction == snake.direction else direction
+
+    def find_run(self, snake, head, target):
+        """Shortest path to target that waits turn_delay moves after each turn.
+
+        Returns the cells in order, or [] if there is none.
+        """
+        delay = self.turn_delay
+        self.mark_body(snake_cells(snake), snake.length)
+        body = self.body
+        body_stamp = self.body_stamp
+        clear_at = self.clear_at
+        neighbours = self.neighbours
+        seen = self.run_seen
+        parent = self.run_parent
+        queue = self.run_queue
+        span = delay + 1
+
+        # A state is (cell * 4 + direction code) * span + ticks still to wait
+        stamp = self.next_stamp()
+        start = DIRECTIONS.index(snake.direction) if snake.direction in DIRECTIONS else None
+        write = 0
+        read = 0
+        depth = 0
+        level_end = 0
+        cell, code, wait = head, start, 0
+        while True:
+            for next_code in range(4):
+                if code is not None and next_code != code and (wait or next_code == REVERSE[code]):
+                    continue
+                next_cell = neighbours[cell * 4 + next_code]
+                if body_stamp[next_cell] == body and clear_at[next_cell] > depth + 1:
+                    continue
+                next_wait = delay if next_code != code else max(wait - 1, 0)
+                next_state = (next_cell * 4 + next_code) * span + next_wait
+                if seen[next_state] == stamp:
+                    continue
+                seen[next_state] = stamp
+                parent[next_state] = queue[read - 1] if read else -1
+                if next_cell == target:
+                    path = []
+                    while next_state >= 0:
+                        path.append(next_state // span // 4)
+                        next_state = parent[next_state]
+                    return path[::-1]
+                queue[write] = next_state
+                write += 1
+            if read == write:
+                return []
+            if read == level_end:
+                depth += 1
+                level_end = write
+            current = queue[read]
+            read += 1
+            wait = current % span
+            cell, code = divmod(current // span, 4)
+
+
+class GreedyPolicy:
+    """Heads for the food through free cells, else any free cell.
+
+    A turn commits the snake to turn_delay + 1 cells straight on, so each
+    direction is scored by the moves to the food by way of the end of that
+    run; ties keep the current direction.
+    """
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.rng = random.Random()
+        self.turn_delay = 0
+
+    def reset(self, seed=None, turn_delay=0):
+        self.rng.seed(seed)
+        self.turn_delay = turn_delay
+
+    def choose(self, state):
+        snake = state.snake
+        width, height = self.grid_width, self.grid_height
+        hy, hx = divmod(snake.head_cell, width)
+        food = state.food.cell
+        fy, fx = divmod(food, width) if food is not None else (hy, hx)
+        best = None
+        for direction in DIRECTIONS:
+            if (-direction[0], -direction[1]) == snake.direction:
+                continue
+            x, y = hx, hy
+            run = 1 if direction == snake.direction else self.turn_delay + 1
+            moves = 0
+            eats = False
+            for _ in range(run):
+                x, y = (x + direction[0]) % width, (y + direction[1]) % height
+                if snake.occupancy[y * width + x]:
+                    break
+                moves += 1
+                if y * width + x == food:
+                    eats = True
+                    break
+            if not moves:
+                continue # Straight into the body
+            if eats:
+                distance = moves
+            else:
+                dx = min((fx - x) % width, (x - fx) % width)
+                dy = min((fy - y) % height, (y - fy) % height)
+                distance = moves + dx + dy
+            # A run cut short by the body is a dead end
+            option = (not eats and moves < run, distance, direction != snake.direction, self.rng.random(), direction)
+            if best is None or option < best:
+                best = option
+        if best is None or best[-1] == snake.direction:
+            return None
+        return best[-1]
+
+
+class RandomPolicy:
+    """Wanders: keeps going, turning now and then, and dodges its body when it can."""
+
+    def __init__(self, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, turn_rate=0.2):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.turn_rate = turn_rate
+        self.rng = random.Random()
+
+    def reset(self, seed=None, turn_delay=0):
+        self.rng.seed(seed)
+
+    def choose(self, state):
+        snake = state.snake
+        width, height = self.grid_width, self.grid_height
+        hy, hx = divmod(snake.head_cell, width)
+        free = []
+        for direction in DIRECTIONS:
+            if (-direction[0], -direction[1]) == snake.direction:
+                continue
+            x, y = (hx + direction[0]) % width, (hy + direction[1]) % height
+            if not snake.occupancy[y * width + x]:
+                free.append(direction)
+        if snake.direction in free and self.rng.random() >= self.turn_rate:
+            return None
+        if not free:
+            return None
+        direction = self.rng.choice(free)
+        return None if direction == snake.direction else direction
+
+
+# Built-in policies; anything else is given as "package.module:Class"
+POLICIES = {
+    "autopilot": AutopilotPolicy,
+    "greedy": GreedyPolicy,
+    "random": RandomPolicy,
+}
+
+_policies = {} # Per process: (spec, width, height) -> policy, built once
+
+
+def load_policy(spec):
+    """Policy class for a POLICIES name or an import path like "mybots:Wall".
+
+    A policy is built as cls(grid_width, grid_height). Each game calls
+    reset(seed, turn_delay), turn_delay being the ticks after a turn
+    before the next one is allowed, then choose(state) each tick the bot
+    may turn, returning a direction or None to keep going (like
+    Autopilot.choose).
+    """
+    if spec in POLICIES:
+        return POLICIES[spec]
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Unknown policy {spec!r} (built in: {', '.join(POLICIES)}; or module:Class)")
+    return getattr(importlib.import_module(module), name)
+
+
+def get_policy(spec, grid_width, grid_height):
+    key = (spec, grid_width, grid_height)
+    if key not in _policies:
+        _policies[key] = load_policy(spec)(grid_width, grid_height)
+    return _policies[key]
+
+
+def reaction_ticks(reaction_ms, ticks_per_second):
+    """Ticks after a turn before the bot may turn again."""
+    return round(reaction_ms * ticks_per_second / 1000)
+
+
+def play_game(policy, seed, lives, delay, max_ticks, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, neighbours=None):
+    """One headless game where the bot can't turn again for delay ticks after a turn.
+
+    Returns a dict: seed, ticks, score, ending and deaths, a list of
+    [tick, cause] per life lost.
+    """
+    neighbours = neighbours or neighbour_table(grid_width, grid_height)
+    state = new_game(seed, grid_width=grid_width, grid_height=grid_height)
+    state.lives = lives
+    snake = state.snake
+    occupancy = snake.occupancy
+    policy.reset(seed, delay)
+    deaths = []
+    locked = 0 # Ticks until the bot can turn again
+    while not state.game_over and state.tick < max_ticks:
+        if locked:
+            action = None
+            locked -= 1
+            late = True
+        else:
+            action = policy.choose(state)
+            late = False
+            if action is not None:
+                locked = delay
+        base = snake.head_cell * 4
+        boxed = all(occupancy[cell] for cell in neighbours[base:base + 4])
+        _, events = step(state, action)
+        if EVENT_DIED in events:
+            cause = BOXED_IN if boxed else LATE_TURN if late else COLLISION
+            deaths.append([state.tick, cause])
+            locked = 0
+    ending = WON if state.won else GAME_OVER if state.game_over else TIME_UP
+    return {"seed": seed, "ticks": state.tick, "score": state.score, "ending": ending, "deaths": deaths}
+
+
+def play_chunk(job):
+    """Worker entry point: plays one chunk of games and returns its checkpoint record."""
+    settings = job["settings"]
+    grid_width, grid_height = settings["grid_width"], settings["grid_height"]
+    ticks_per_second = DIFFICULTY[job["difficulty"]]
+    delay = reaction_ticks(settings["reaction_ms"], ticks_per_second)
+    max_ticks = round(settings["minutes"] * 60 * ticks_per_second)
+    policy = get_policy(job["policy"], grid_width, grid_height)
+    neighbours = neighbour_table(grid_width, grid_height)
+    games = [play_game(policy, settings["seed"] + i, job["lives"], delay, max_ticks, grid_width, grid_height, neighbours)
+             for i in range(job["start"], job["start"] + job["count"])]
+    return dict(chunk_key(job), games=games)
+
+
+def chunk_key(job):
+    return {"policy": job["policy"], "difficulty": job["difficulty"], "lives": job["lives"],
+            "start": job["start"], "count": job["count"]}
+
+
+def make_jobs(settings, policies, difficulties, lives_options, games, chunk_size):
+    return [{"settings": settings, "policy": policy, "difficulty": difficulty, "lives": lives,
+             "start": start, "count": min(chunk_size, games - start)}
+            for policy in policies for difficulty in difficulties for lives in lives_options
+            for start in range(0, games, chunk_size)]
+
+
+def read_checkpoint(path, settings):
+    """Chunk records already in the checkpoint file.
+
+    A line cut short by an interrupted run is ignored (its chunk runs again).
+    Raises ValueError if the file was written with different settings.
+    """
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "settings" in record:
+                if record["settings"] != settings:
+                    raise ValueError(f"{path} was written with different settings: {record['settings']}")
+            elif "games" in record:
+                records.append(record)
+    return records
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def summarize(records, settings):
+    """One report row per (policy, difficulty, lives), from chunk records."""
+    groups = {}
+    for record in records:
+        key = (record["policy"], record["difficulty"], record["lives"])
+        groups.setdefault(key, {})[record["start"]] = record["games"]
+
+    rows = []
+    for (policy, difficulty, lives), chunks in groups.items():
+        games = [game for start in sorted(chunks) for game in chunks[start]]
+        ticks_per_second = DIFFICULTY[difficulty]
+        scores = sorted(game["score"] for game in games)
+        seconds = sorted(game["ticks"] / ticks_per_second for game in games)
+        endings = Counter(game["ending"] for game in games)
+        causes = Counter(cause for game in games for _, cause in game["deaths"])
+        deaths = sum(causes.values())
+        # Lives that ran out of time never died, so time played per death
+        # is the fair survival figure
+        first_deaths = sorted(game["deaths"][0][0] / ticks_per_second for game in games if game["deaths"])
+        row = {
+            "policy": policy,
+            "difficulty": difficulty,
+            "ticks_per_second": ticks_per_second,
+            "lives": lives,
+            "reaction_ticks": reaction_ticks(settings["reaction_ms"], ticks_per_second),
+            "games": len(games),
+            "won": endings[WON],
+            "game_over": endings[GAME_OVER],
+            "time_up": endings[TIME_UP],
+            "seconds_mean": round(sum(seconds) / len(seconds), 1),
+            "seconds_median": round(percentile(seconds, 0.5), 1),
+            "seconds_per_death": round(sum(seconds) / deaths, 1) if deaths else None,
+            "first_death_median": round(percentile(first_deaths, 0.5), 1) if first_deaths else None,
+            "score_mean": round(sum(scores) / len(scores), 1),
+            "score_p10": percentile(scores, 0.1),
+            "score_p50": percentile(scores, 0.5),
+            "score_p90": percentile(scores, 0.9),
+            "score_max": scores[-1],
+            "deaths": deaths,
+        }
+        for cause in CAUSES:
+            row[f"deaths_{cause}"] = causes[cause]
+        row["score_histogram"] = {str(bucket): count for bucket, count in
+                                  sorted(Counter(score // 100 * 100 for score in scores).items())}
+        rows.append(row)
+    return rows
+
+
+def write_report(rows, path, settings):
+    """CSV, or JSON (with the settings and score histograms) for a .json path."""
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "results": rows}, f, indent=2)
+        return
+    import csv
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if not rows:
+            return
+        fields = [field for field in rows[0] if field != "score_histogram"]
+        writer = csv.DictWriter(f, fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv):
+    """python -m src.tournament [--policy NAME ...] [--difficulty NAME ...] [--lives N ...] [--games N]
+
+    Plays seeded bot games on a process pool and reports survival, scores
+    and death causes per difficulty. Finished chunks stream into the
+    checkpoint file; running the same command again picks up where an
+    interrupted run stopped.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m src.tournament", description="Play bot tournaments across difficulties.")
+    parser.add_argument("--policy", nargs="+", default=["autopilot"],
+                        help=f"bots to play: {', '.join(POLICIES)} or module:Class")
+    parser.add_argument("--difficulty", nargs="+", default=list(DIFFICULTY), choices=list(DIFFICULTY))
+    parser.add_argument("--lives", type=int, nargs="+", default=[START_LIVES], help="lives per game, one run each")
+    parser.add_argument("--games", type=int, default=200, help="games per policy, difficulty and lives")
+    parser.add_argument("--chunk", type=int, default=20, help="games per unit of work and checkpoint line")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--minutes", type=float, default=10, help="stop a game after this much game time")
+    parser.add_argument("--reaction-ms", type=float, default=REACTION_MS, help="bot reaction time")
+    parser.add_argument("--size", default=f"{GRID_WIDTH}x{GRID_HEIGHT}", help="board size in cells")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default="tournament.jsonl", help="results so far, one chunk per line")
+    parser.add_argument("--report", default="tournament.csv", help="summary file, .csv or .json")
+    args = parser.parse_args(argv)
+    grid_width, grid_height = (int(v) for v in args.size.lower().split("x"))
+    for spec in args.policy:
+        try:
+            load_policy(spec) # Fail now, not in every worker
+        except (ValueError, ImportError, AttributeError) as e:
+            parser.error(f"--policy {spec}: {e}")
+
+    # Anything that changes a game's outcome; a checkpoint is only resumed
+    # with the same values
+    settings = {"seed": args.seed, "minutes": args.minutes, "reaction_ms": args.reaction_ms,
+                "grid_width": grid_width, "grid_height": grid_height}
+    try:
+        records = read_checkpoint(args.checkpoint, settings)
+    except ValueError as e:
+        print(f"{e}; use another --checkpoint or delete it")
+        return 1
+    done = {tuple(chunk_key(record).values()) for record in records}
+    jobs = [job for job in make_jobs(settings, args.policy, args.difficulty, args.lives, args.games, args.chunk)
+            if tuple(chunk_key(job).values()) not in done]
+    if records:
+        print(f"Resuming {args.checkpoint}: {len(done)} chunks done, {len(jobs)} to go")
+
+    interrupted = False
+    if jobs:
+        with open(args.checkpoint, "a+", encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(max_workers=args.workers) as executor:
+            if checkpoint.tell() == 0:
+                checkpoint.write(json.dumps({"settings": settings}) + "\n")
+            else:
+                checkpoint.seek(checkpoint.tell() - 1)
+                if checkpoint.read(1) != "\n":
+                    checkpoint.write("\n") # End the line an interrupted write left unfinished
+            futures = [executor.submit(play_chunk, job) for job in jobs]
+            try:
+                for finished, future in enumerate(as_completed(futures), 1):
+                    record = future.result()
+                    checkpoint.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    checkpoint.flush() # Each finished chunk survives an interruption
+                    records.append(record)
+                    print(f"[{finished}/{len(jobs)}] {record['policy']} {record['difficulty']} "
+                          f"lives {record['lives']}: games {record['start']}-{record['start'] + record['count'] - 1}")
+            except KeyboardInterrupt:
+                interrupted = True
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    rows = summarize(records, settings)
+    write_report(rows, args.report, settings)
+    for row in rows:
+        causes = ", ".join(f"{row['deaths_' + cause]} {cause}" for cause in CAUSES)
+        print(f"{row['policy']:>10} {row['difficulty']:<6} lives {row['lives']}: {row['games']} games, "
+              f"median {row['seconds_median']}s, score p50 {row['score_p50']} p90 {row['score_p90']}, "
+              f"{row['deaths']} deaths ({causes})")
+    print(f"Report written to {args.report}")
+    if interrupted:
+        print(f"Interrupted; run the same command again to resume from {args.checkpoint}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,6 +1,7 @@
 import pygame
+from src.fonts import render_text
 
 def draw_text(surface, text, font, color, center_pos):
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(text, font, color)
     rect = text_surface.get_rect(center=center_pos)
     surface.blit(text_surface, rect)
@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from src.constants import GRID_WIDTH, GRID_HEIGHT
+from src.replay import Replay, ReplayError, play, matches
+
+# Longest replay the verifier will simulate (about 23 hours on Hard)
+MAX_TICKS = 1_000_000
+
+VERIFIED = "verified"
+REJECTED = "rejected"
+
+
+def verify_replay(data, claimed_score, difficulty):
+    """Re-simulate a submitted replay. Returns (ok, reason).
+
+    ok means the replay belongs to this difficulty, is well formed, and
+    replaying its inputs from its seed ends exactly as its footer says with
+    the claimed score. It proves the score is reachable with those inputs,
+    not that a person played them in real time.
+    """
+    if data is None:
+        return False, "no replay"
+    try:
+        replay = Replay.from_bytes(data)
+    except ReplayError as e:
+        return False, str(e)
+    if not replay.complete:
+        return False, "replay has no result"
+    if replay.difficulty != difficulty:
+        return False, f"replay is for {replay.difficulty}"
+    if (replay.grid_width, replay.grid_height) != (GRID_WIDTH, GRID_HEIGHT):
+        return False, "wrong board size"
+    if replay.final[0] > MAX_TICKS:
+        return False, "replay too long"
+
+    state = play(replay)
+    if not matches(replay, state):
+        return False, "replay does not reproduce its result"
+    if state.score != claimed_score:
+        return False, f"replay scores {state.score}, not {claimed_score}"
+    return True, ""
+
+
+def check_row(row):
+    """Worker entry point: (id, upload_key, score, difficulty, replay) -> (id, upload_key, status, reason)."""
+    row_id, upload_key, score, difficulty, replay = row
+    try:
+        ok, reason = verify_replay(replay, score, difficulty)
+    except Exception as e:
+        # A replay that crashes the engine is not a valid game either
+        ok, reason = False, f"error: {e}"
+    return row_id, upload_key, VERIFIED if ok else REJECTED, reason
+
+
+def check_rows(rows, executor=None, chunksize=16):
+    """check_row over many rows, in parallel when given a process pool."""
+    if executor is None:
+        return [check_row(row) for row in rows]
+    return list(executor.map(check_row, rows, chunksize=chunksize))
+
+
+def verify_pending(db, executor=None, batch_size=500):
+    """Verify every pending score in db. Returns (verified, rejected) counts."""
+    verified = rejected = 0
+    while True:
+        rows = db.pending_verifications(batch_size)
+        if not rows:
+            break
+        results = check_rows(rows, executor)
+        for row_id, _, status, reason in results:
+            if status == REJECTED:
+                logging.info(f"Rejected score {row_id}: {reason}")
+        updated = db.record_verifications([(row_id, key, status) for row_id, key, status, _ in results])
+        if not updated:
+            # Failed, or nothing matched; fetching again could return the
+            # same batch forever
+            break
+        verified += sum(1 for result in results if result[2] == VERIFIED)
+        rejected += sum(1 for result in results if result[2] == REJECTED)
+        if len(rows) < batch_size:
+            break
+    return verified, rejected
+
+
+def main(argv):
+    """python -m src.verify [--workers N] [--batch N] [--watch SECONDS]
+
+    Checks pending scores in the database from .env, once or every SECONDS.
+    """
+    import argparse
+    from src.database import Database
+
+    parser = argparse.ArgumentParser(prog="python -m src.verify", description="Verify submitted scores by replaying them.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--batch", type=int, default=500, help="scores fetched per round trip")
+    parser.add_argument("--watch", type=float, default=None, help="keep running, checking every SECONDS")
+    args = parser.parse_args(argv)
+    # Database reports connection attempts through logging
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    db = Database()
+    db.connect()
+    if not db.connected:
+        return 1
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            while True:
+                started = time.perf_counter()
+                verified, rejected = verify_pending(db, executor, args.batch)
+                if verified or rejected:
+                    elapsed = time.perf_counter() - started
+                    print(f"{verified} verified, {rejected} rejected in {elapsed:.1f}s")
+                if args.watch is None:
+                    break
+                time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,47 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.autopilot import Autopilot
+from src.engine import new_game, step
+from src.replay import Replay, ReplayRecorder
+
+
+def play_recorded(seed, max_ticks=1500, difficulty="Medium"):
+    """Autopilot game recorded the way Game records one. Returns (final state, replay bytes)."""
+    state = new_game(seed)
+    autopilot = Autopilot()
+    recorder = ReplayRecorder(seed, difficulty, state.snake.grid_width, state.snake.grid_height)
+    while not state.game_over and state.tick < max_ticks:
+        action = autopilot.choose(state)
+        if action is not None:
+            recorder.record(state.tick, action)
+        step(state, action)
+    recorder.finish(state)
+    return state, bytes(recorder.data)
+
+
+def reencode(data, score=None, inputs=None):
+    """Re-encode a replay with another claimed score and/or other inputs, keeping the rest of the footer."""
+    replay = Replay.from_bytes(data)
+    recorder = ReplayRecorder(replay.seed, replay.difficulty, replay.grid_width, replay.grid_height)
+    for tick, direction in replay.inputs if inputs is None else inputs:
+        recorder.record(tick, direction)
+    tick, recorded_score, lives, flags = replay.final
+    score = recorded_score if score is None else score
+    recorder.finish(SimpleNamespace(tick=tick, score=score, lives=lives, game_over=bool(flags & 1), won=bool(flags & 2)))
+    return bytes(recorder.data)
+
+
+@pytest.fixture
+def record_game():
+    return play_recorded
+
+
+@pytest.fixture
+def forge():
+    return reencode
@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from src.batch_engine import check_against_engine
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("grid_width, grid_height", [(40, 30), (5, 4)])
+def test_batch_matches_scalar_engine(seed, grid_width, grid_height):
+    over, won = check_against_engine(20, 400, seed, grid_width, grid_height)
+    if (grid_width, grid_height) == (5, 4):
+        # The small board is where lives run out; make sure that was covered
+        assert over > 0
@@ -0,0 +1,32 @@
+from src.replay import Replay, play, matches
+
+
+def test_round_trip_replays_the_game(record_game):
+    state, data = record_game(7)
+    assert state.score > 0
+
+    replay = Replay.from_bytes(data)
+    assert replay.seed == 7
+    assert replay.difficulty == "Medium"
+    assert replay.complete
+    assert replay.final == (state.tick, state.score, state.lives, 0)
+
+    replayed = play(replay)
+    assert matches(replay, replayed)
+    assert (replayed.tick, replayed.score) == (state.tick, state.score)
+    assert replayed.snake.head_cell == state.snake.head_cell
+
+
+def test_truncated_replay_plays_but_does_not_match(record_game):
+    _, data = record_game(8, max_ticks=300)
+    replay = Replay.from_bytes(data[:len(data) // 2])
+    assert not replay.complete
+    assert not matches(replay, play(replay))
+
+
+def test_forged_footer_does_not_match(record_game, forge):
+    state, data = record_game(9)
+    replay = Replay.from_bytes(forge(data))
+    assert matches(replay, play(replay)) # Re-encoding alone changes nothing
+    replay = Replay.from_bytes(forge(data, state.score + 10))
+    assert not matches(replay, play(replay))
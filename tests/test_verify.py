@@ -0,0 +1,48 @@
+import pytest
+
+from src.engine import UP, DOWN, LEFT, RIGHT
+from src.replay import Replay
+from src.verify import verify_replay, check_row, VERIFIED, REJECTED
+
+
+@pytest.fixture
+def game(record_game):
+    return record_game(11)
+
+
+def test_genuine_replay_is_verified(game):
+    state, data = game
+    assert verify_replay(data, state.score, "Medium") == (True, "")
+    assert check_row((1, "key", state.score, "Medium", data)) == (1, "key", VERIFIED, "")
+
+
+def test_higher_claim_is_rejected(game):
+    state, data = game
+    ok, reason = verify_replay(data, state.score + 10, "Medium")
+    assert not ok
+    assert "not" in reason
+
+
+def test_forged_footer_is_rejected(game, forge):
+    state, data = game
+    ok, reason = verify_replay(forge(data, state.score + 10), state.score + 10, "Medium")
+    assert not ok
+    assert reason == "replay does not reproduce its result"
+
+
+def test_tampered_input_is_rejected(game, forge):
+    state, data = game
+    # The first turn goes the other way; the footer still says how the real game ended
+    inputs = Replay.from_bytes(data).inputs
+    tick, direction = inputs[0]
+    turned = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}[direction]
+    tampered = forge(data, inputs=[(tick, turned)] + inputs[1:])
+    assert verify_replay(tampered, state.score, "Medium") == (False, "replay does not reproduce its result")
+
+
+def test_wrong_difficulty_and_garbage_are_rejected(game):
+    state, data = game
+    assert verify_replay(data, state.score, "Hard") == (False, "replay is for Medium")
+    assert not verify_replay(b"not a replay", state.score, "Medium")[0]
+    assert verify_replay(None, 0, "Medium") == (False, "no replay")
+    assert check_row((2, None, 0, "Medium", b"MRRP\x01\xff"))[2] == REJECTED